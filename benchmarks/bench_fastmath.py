@@ -0,0 +1,120 @@
+"""对比每帧逻辑中被替换的 NumPy 标量路径与 fastmath 纯标量路径。
+
+运行方式：python -m benchmarks.bench_fastmath
+"""
+import timeit
+try:
+    import numpy as np
+except ImportError:
+    # 基准套件只运行标量路径，没有 NumPy 时也可以导入本模块
+    np = None
+from config import ANGLE_TOLERANCE, DRAG_THRESHOLD
+from fastmath import distance2d, ease_in_out, ray_point_distance, ray_hit_height
+
+
+def _numpy_drag_active(mouse_pos, mouse_down_pos):
+    return np.linalg.norm(np.array(mouse_pos) - np.array(mouse_down_pos)) > DRAG_THRESHOLD
+
+
+def _scalar_drag_active(mouse_pos, mouse_down_pos):
+    return distance2d(mouse_pos[0], mouse_pos[1], mouse_down_pos[0], mouse_down_pos[1]) > DRAG_THRESHOLD
+
+
+def _numpy_pillar_distance(x, z, px, pz):
+    return np.linalg.norm([x - px, z - pz]) < 0.7
+
+
+def _scalar_pillar_distance(x, z, px, pz):
+    return distance2d(x, z, px, pz) < 0.7
+
+
+def _numpy_top_color(angle):
+    return 1 if np.isclose(angle % 360, 180.0, atol=ANGLE_TOLERANCE) else 0
+
+
+def _scalar_top_color(orientation):
+    return 1 if orientation else 0
+
+
+def _numpy_ease(progress):
+    return 0.5 - 0.5 * np.cos(progress * np.pi)
+
+
+def _numpy_ray_pick(ray_origin, ray_dir, position):
+    torus_center = np.array(position)
+    v = torus_center - ray_origin
+    t_proj = np.dot(v, ray_dir)
+    closest_point_on_ray = ray_origin + t_proj * ray_dir
+    return t_proj, np.linalg.norm(torus_center - closest_point_on_ray)
+
+
+def _numpy_ray_plane(ray_origin, ray_dir, y):
+    plane_normal = np.array([0, 1, 0])
+    denom = np.dot(ray_dir, plane_normal)
+    if abs(denom) > 1e-6:
+        t = (y - ray_origin[1]) / denom
+        return ray_origin + t * ray_dir
+    return None
+
+
+# 各用例共用的射线和圆环位置
+RAY_ORIGIN = (0.0, 5.0, 25.0)
+RAY_DIRECTION = (0.05, -0.2, -0.978)
+TORUS_POSITION = [6.0, 0.5, 0.0]
+
+
+def scalar_cases():
+    """返回 (名称, 标量实现) 的列表，不依赖 NumPy。"""
+    return [
+        ("drag_active",
+         lambda: _scalar_drag_active((120, 340), (100, 300))),
+        ("pillar_distance",
+         lambda: _scalar_pillar_distance(5.9, 0.1, 6.0, 0.0)),
+        ("top_color",
+         lambda: _scalar_top_color(1)),
+        ("ease_in_out",
+         lambda: ease_in_out(0.37)),
+        ("ray_point_distance",
+         lambda: ray_point_distance(RAY_ORIGIN, RAY_DIRECTION, TORUS_POSITION)),
+        ("ray_hit_height",
+         lambda: ray_hit_height(RAY_ORIGIN, RAY_DIRECTION, 6.0)),
+    ]
+
+
+def build_cases():
+    """返回 (名称, NumPy 实现, 标量实现) 的列表。"""
+    np_origin, np_direction = np.array(RAY_ORIGIN), np.array(RAY_DIRECTION)
+    numpy_funcs = [
+        lambda: _numpy_drag_active((120, 340), (100, 300)),
+        lambda: _numpy_pillar_distance(5.9, 0.1, 6.0, 0.0),
+        lambda: _numpy_top_color(180.0),
+        lambda: _numpy_ease(0.37),
+        lambda: _numpy_ray_pick(np_origin, np_direction, TORUS_POSITION),
+        lambda: _numpy_ray_plane(np_origin, np_direction, 6.0),
+    ]
+    return [(name, numpy_func, scalar_func)
+            for (name, scalar_func), numpy_func in zip(scalar_cases(), numpy_funcs)]
+
+
+def run(number=20000, repeat=5):
+    """运行所有用例，返回 (名称, NumPy 耗时, 标量耗时) 列表，单位为纳秒每次调用。"""
+    results = []
+    for name, numpy_func, scalar_func in build_cases():
+        numpy_ns = min(timeit.repeat(numpy_func, number=number, repeat=repeat)) / number * 1e9
+        scalar_ns = min(timeit.repeat(scalar_func, number=number, repeat=repeat)) / number * 1e9
+        results.append((name, numpy_ns, scalar_ns))
+    return results
+
+
+def main():
+    if np is None:
+        print("NumPy is required for the comparison; "
+              "the scalar paths alone run in python -m benchmarks.suite")
+        return
+    print(f"{'case':<42}{'numpy ns':>12}{'scalar ns':>12}{'speedup':>10}")
+    for name, numpy_ns, scalar_ns in run():
+        print(f"{name:<42}{numpy_ns:>12.0f}{scalar_ns:>12.0f}{numpy_ns / scalar_ns:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
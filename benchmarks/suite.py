@@ -0,0 +1,329 @@
+"""完整的性能基准测试套件，支持保存结果和与基线比较。
+
+运行：   python -m benchmarks.suite run --rings 3 4 5 --output results.json
+比较：   python -m benchmarks.suite compare results.json --baseline benchmarks/baseline.json
+保存基线：python -m benchmarks.suite run --output benchmarks/baseline.json
+
+需要 OpenGL 上下文的用例（draw_text、draw_text_cold、完整帧）在无显示环境下会被跳过，
+可以在 Mesa 软件渲染下运行，例如 xvfb-run python -m benchmarks.suite run。
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from config import torus_sizes_for
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+DEFAULT_RINGS = [3, 4, 5]
+DEFAULT_THRESHOLD = 0.10
+
+# 无显示时使用 Mesa 软件渲染，保证各机器结果可比
+os.environ.setdefault("LIBGL_ALWAYS_SOFTWARE", "1")
+
+
+def measure(func, repeat=5, min_time=0.2):
+    """自动确定调用次数并重复测量，返回每次调用耗时的统计（秒）。"""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.mean(times),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def _top_ray(game_state, pillar_idx):
+    """返回从目标柱子正上方垂直向下的射线。"""
+    px, pz = game_state.pillars[pillar_idx].position
+    return (px, 50.0, pz), (0.0, -1.0, 0.0)
+
+
+def bench_picking(num_rings):
+    from game_state import GameState
+    game_state = GameState(torus_sizes_for(num_rings))
+    ray_origin, ray_dir = _top_ray(game_state, 0)
+    return lambda: game_state.find_topmost_colliding_torus(ray_origin, ray_dir)
+
+
+def bench_move_validation(num_rings):
+    from game_state import GameState
+    game_state = GameState(torus_sizes_for(num_rings))
+    game_state.original_pillar_index = 0
+    return lambda: game_state.is_move_valid(0, 1, check_only=True)
+
+
+def bench_win_check(num_rings):
+    from game_state import GameState
+    from utils import check_win_condition
+    from config import WIN_PILLAR_INDEX
+    game_state = GameState(torus_sizes_for(num_rings))
+    return lambda: check_win_condition(game_state.tori, game_state.pillars, WIN_PILLAR_INDEX)
+
+
+def bench_animation_step(num_rings):
+    from game_state import GameState
+    game_state = GameState(torus_sizes_for(num_rings))
+    # 固定在翻转动画中途，每次调用都走完整的插值路径
+    for torus in game_state.tori:
+        torus.animation_state = 'FLIPPING'
+        torus.flip_start_time = 0.0
+        torus.flip_target_angle = 180.0
+
+    def step():
+        for torus in game_state.tori:
+            torus.update_animation(0.1)
+    return step
+
+
+def bench_mesh_generation(num_rings):
+    from objects import build_torus_mesh
+    sizes = torus_sizes_for(num_rings)
+
+    def build():
+        for inner_radius, outer_radius in sizes:
+            build_torus_mesh(inner_radius, outer_radius)
+    return build
+
+
+def bench_solver(num_rings):
+    from solver import build_distance_table
+    return lambda: build_distance_table(num_rings, 3)
+
+
+_gl_app = None
+
+
+def _get_gl_app():
+    """创建一次共享的游戏窗口，无法创建 OpenGL 上下文时返回 None。"""
+    global _gl_app
+    if _gl_app is None:
+        import pygame
+        from main import GameApp
+        try:
+            # 单线程模式，保证每次调用都完成一次完整的模拟和渲染
+            _gl_app = GameApp(threaded=False)
+            # 等待后台预热完成，避免测到未就绪的帧
+            _gl_app.warmup.wait()
+        except pygame.error:
+            _gl_app = False
+    return _gl_app or None
+
+
+def bench_draw_text(num_rings):
+    app = _get_gl_app()
+    if app is None:
+        return None
+    from utils import draw_text
+    return lambda: draw_text("Moves: 25", (10, 10), app.font_medium,
+                             (app.width, app.height), is_ui=True, align="topleft")
+
+
+def bench_draw_text_cold(num_rings):
+    app = _get_gl_app()
+    if app is None:
+        return None
+    import pygame
+    from utils import draw_text
+    # 普通字体不经过缓存，每次调用都重新栅格化文本
+    font = pygame.font.Font(None, 36)
+    return lambda: draw_text("Moves: 25", (10, 10), font,
+                             (app.width, app.height), is_ui=True, align="topleft")
+
+
+def bench_headless_frame(num_rings):
+    app = _get_gl_app()
+    if app is None:
+        return None
+    from game_state import GameState
+    app.game_state = GameState(torus_sizes_for(num_rings))
+    # 快照只读取已生成的网格，替换游戏状态后需要重新生成
+    for torus in app.game_state.tori:
+        torus.get_mesh()
+
+    def frame():
+        app.handle_events()
+        app.render(app.snapshots.latest())
+    return frame
+
+
+# (名称, 构造函数)，构造函数接收圆环数，返回待测函数或 None（跳过）
+BENCHMARKS = [
+    ("picking", bench_picking),
+    ("move_validation", bench_move_validation),
+    ("win_check", bench_win_check),
+    ("animation_step", bench_animation_step),
+    ("mesh_generation", bench_mesh_generation),
+    ("solver", bench_solver),
+    ("draw_text", bench_draw_text),
+    ("draw_text_cold", bench_draw_text_cold),
+    ("headless_frame", bench_headless_frame),
+]
+
+
+# 与圆环数无关的 fastmath 标量路径，每个用例只运行一次，名称前缀为 "fastmath."
+FASTMATH_PREFIX = "fastmath."
+
+
+def fastmath_benchmarks():
+    """返回 (名称, 待测函数) 的列表，来自 bench_fastmath 的标量实现。"""
+    from benchmarks.bench_fastmath import scalar_cases
+    return [(FASTMATH_PREFIX + name, func) for name, func in scalar_cases()]
+
+
+def measure_import_time(module="main", repeat=5):
+    """在新进程中测量导入模块的耗时（秒）。"""
+    code = ("import time; start = time.perf_counter(); "
+            f"import {module}; print(time.perf_counter() - start)")
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return {
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.mean(times),
+        "number": 1,
+        "repeat": repeat,
+    }
+
+
+def machine_metadata():
+    """收集运行环境信息，便于解释不同机器之间的结果差异。"""
+    metadata = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+    for name in ("numpy", "pygame", "OpenGL"):
+        try:
+            metadata[name] = __import__(name).__version__
+        except (ImportError, AttributeError):
+            metadata[name] = None
+    try:
+        metadata["commit"] = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        metadata["commit"] = None
+    return metadata
+
+
+def run_suite(rings, names=None, repeat=5):
+    """运行基准测试，返回可保存为 JSON 的结果字典。"""
+    results = []
+    skipped = []
+    for name, factory in BENCHMARKS:
+        if names and name not in names:
+            continue
+        for num_rings in rings:
+            func = factory(num_rings)
+            if func is None:
+                skipped.append({"name": name, "rings": num_rings,
+                                "reason": "no OpenGL context"})
+                continue
+            stats = measure(func, repeat=repeat)
+            results.append({"name": name, "rings": num_rings, **stats})
+            print(f"{name:<18} rings={num_rings:<3} {stats['min_s'] * 1e6:>12.2f} us")
+    for name, func in fastmath_benchmarks():
+        # --only fastmath 选择全部标量用例
+        if names and name not in names and "fastmath" not in names:
+            continue
+        stats = measure(func, repeat=repeat)
+        results.append({"name": name, "rings": None, **stats})
+        print(f"{name:<28} {stats['min_s'] * 1e6:>12.2f} us")
+    if not names or "import_time" in names:
+        stats = measure_import_time(repeat=repeat)
+        results.append({"name": "import_time", "rings": None, **stats})
+        print(f"{'import_time':<18} {'':<9} {stats['min_s'] * 1e6:>12.2f} us")
+    for item in skipped:
+        print(f"{item['name']:<18} rings={item['rings']:<3} skipped: {item['reason']}")
+    return {"metadata": machine_metadata(), "results": results, "skipped": skipped}
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """按最小耗时比较两次结果，返回 (行列表, 是否存在回退)。"""
+    baseline_by_key = {(r["name"], r["rings"]): r for r in baseline["results"]}
+    rows = []
+    regressed = False
+    for result in current["results"]:
+        key = (result["name"], result["rings"])
+        base = baseline_by_key.get(key)
+        if base is None:
+            rows.append((key, None, result["min_s"], None, "new"))
+            continue
+        ratio = result["min_s"] / base["min_s"]
+        if ratio > 1 + threshold:
+            status = "REGRESSION"
+            regressed = True
+        elif ratio < 1 - threshold:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((key, base["min_s"], result["min_s"], ratio, status))
+    return rows, regressed
+
+
+def _print_comparison(rows):
+    print(f"{'benchmark':<28}{'baseline us':>14}{'current us':>14}{'ratio':>9}  status")
+    for (name, rings), base, current, ratio, status in rows:
+        label = name if rings is None else f"{name}[{rings}]"
+        base_text = "-" if base is None else f"{base * 1e6:.2f}"
+        ratio_text = "-" if ratio is None else f"{ratio:.2f}"
+        print(f"{label:<28}{base_text:>14}{current * 1e6:>14.2f}{ratio_text:>9}  {status}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Magnetic Circulation Hanoi benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmark suite")
+    run_parser.add_argument("--rings", type=int, nargs="+", default=DEFAULT_RINGS)
+    run_parser.add_argument("--only", nargs="+", help="benchmark names to run ('fastmath' selects all scalar math cases)")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--output", help="write results as JSON to this path")
+
+    compare_parser = subparsers.add_parser("compare", help="compare results against a baseline")
+    compare_parser.add_argument("current", help="results JSON to check")
+    compare_parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="allowed slowdown as a fraction (default 0.10)")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        results = run_suite(args.rings, args.only, args.repeat)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run "
+              f"`python -m benchmarks.suite run --output {args.baseline}` first", file=sys.stderr)
+        return 2
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    rows, regressed = compare(baseline, current, args.threshold)
+    _print_comparison(rows)
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
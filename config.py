@@ -1,4 +1,4 @@
-import numpy as np
+import os
 
 # --- 游戏常量 ---
 # 精度容忍值
@@ -18,6 +18,8 @@ REVERT_ANIMATION_DURATION = 0.3
 
 # 常态暗度
 DARK_FACTOR = 0.6
+# 圆环网格分段数
+TORUS_SEGMENTS = 30
 
 # 游戏设置
 
@@ -42,9 +44,67 @@ FLOAT_HEIGHT = PILLAR_HEIGHT + FLOAT_HEIGHT_OFFSET
 # 圆环尺寸
 TORUS_SIZES = [(0.5, 1.0), (0.6, 1.2), (0.7, 1.4)]
 
+
+def torus_sizes_for(num_rings):
+    """返回指定圆环数的尺寸，与 TORUS_SIZES 一致并按相同规律扩展。"""
+    if num_rings == len(TORUS_SIZES):
+        return TORUS_SIZES
+    return [(round(0.5 + 0.1 * i, 2), round(1.0 + 0.2 * i, 2)) for i in range(num_rings)]
+
+
 # 游戏规则设置
 # 目标胜利柱子是 C (索引2)
 WIN_PILLAR_INDEX = 2
 
 # UI 文本
 ERROR_MESSAGE_TEXT = "Illegal Operation"
+
+# 提示设置
+# 提示信息显示时长
+HINT_MESSAGE_DURATION = 3.0
+# 规则集标识，规则变化时需修改，用于区分缓存
+RULE_SET_ID = "clockwise-size-color"
+
+# 求解缓存设置
+# 缓存格式版本，文件格式变化时递增
+HINT_CACHE_VERSION = 1
+# 缓存目录，可通过环境变量覆盖
+HINT_CACHE_DIR = os.environ.get(
+    "HANOI_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "magnetic_circulation_hanoi"))
+# 缓存目录总大小上限（字节），超出后按最久未使用淘汰
+HINT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# 移动检查结果：合法或非法原因
+MOVE_OK = 0
+ILLEGAL_NOT_CLOCKWISE = 1
+ILLEGAL_LARGER_ON_SMALLER = 2
+ILLEGAL_COLOR_REPULSION = 3
+ILLEGAL_MOVE_REASONS = {
+    ILLEGAL_NOT_CLOCKWISE: "Must move clockwise.",
+    ILLEGAL_LARGER_ON_SMALLER: "Cannot place larger ring on smaller one.",
+    ILLEGAL_COLOR_REPULSION: "Color repulsion.",
+}
+
+# 遥测设置
+# 最低记录级别："DEBUG"、"INFO"、"WARNING"
+TELEMETRY_LEVEL = os.environ.get("HANOI_TELEMETRY_LEVEL", "INFO")
+# 输出格式："jsonl" 或 "binary"
+TELEMETRY_FORMAT = os.environ.get("HANOI_TELEMETRY_FORMAT", "jsonl")
+# 输出目录
+TELEMETRY_DIR = os.environ.get("HANOI_TELEMETRY_DIR", "telemetry")
+# 环形缓冲区容量，写满后丢弃最旧的事件
+TELEMETRY_BUFFER_SIZE = 8192
+# 后台线程批量写出的间隔（秒）
+TELEMETRY_FLUSH_INTERVAL = 1.0
+# 采样率：每 N 个同类事件记录一个
+TELEMETRY_SAMPLE_EVERY = {"frame": 60}
+
+# 相机投影设置
+CAMERA_FOV = 45.0
+CAMERA_NEAR = 0.1
+CAMERA_FAR = 100.0
+
+# 模拟线程设置
+# 模拟线程的固定频率（次/秒）
+SIM_TICK_RATE = 120
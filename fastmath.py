@@ -0,0 +1,68 @@
+import math
+
+# 每帧逻辑使用的纯标量几何与缓动函数。
+# 这些函数只处理少量标量，用 math 比构造 NumPy 数组快一个数量级以上。
+
+
+def distance2d(x1, y1, x2, y2):
+    """计算两个二维点之间的距离。"""
+    return math.hypot(x1 - x2, y1 - y2)
+
+
+def dot3(a, b):
+    """计算两个三维向量的点积。"""
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def sub3(a, b):
+    """计算两个三维向量的差。"""
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+
+def norm3(a):
+    """计算三维向量的长度。"""
+    return math.sqrt(a[0] * a[0] + a[1] * a[1] + a[2] * a[2])
+
+
+def normalize3(a):
+    """返回三维向量的单位向量。"""
+    length = norm3(a)
+    return (a[0] / length, a[1] / length, a[2] / length)
+
+
+def point_along_ray(origin, direction, t):
+    """返回射线上参数为 t 的点。"""
+    return (origin[0] + t * direction[0],
+            origin[1] + t * direction[1],
+            origin[2] + t * direction[2])
+
+
+def ray_point_distance(origin, direction, point):
+    """返回点在射线上的投影参数和点到射线所在直线的距离。"""
+    v = sub3(point, origin)
+    t_proj = dot3(v, direction)
+    closest = point_along_ray(origin, direction, t_proj)
+    return t_proj, norm3(sub3(point, closest))
+
+
+def ray_hit_height(origin, direction, y, eps=1e-6):
+    """计算射线与水平面 Y=y 的交点，射线与平面平行时返回 None。"""
+    if abs(direction[1]) <= eps:
+        return None
+    t = (y - origin[1]) / direction[1]
+    return point_along_ray(origin, direction, t)
+
+
+def ease_in_out(progress):
+    """余弦缓动，使动画在开始和结束时更平滑。"""
+    return 0.5 - 0.5 * math.cos(progress * math.pi)
+
+
+def lerp(start, end, t):
+    """线性插值。"""
+    return start + (end - start) * t
+
+
+def is_close(a, b, atol):
+    """检查两个标量的差是否在容差范围内。"""
+    return abs(a - b) <= atol
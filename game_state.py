@@ -1,27 +1,35 @@
-import numpy as np
+import math
 from config import *
 from objects import Torus, Pillar
 from utils import get_pillar_index_at_pos
+from fastmath import distance2d, ray_point_distance, ray_hit_height
+from telemetry import telemetry, EVENT_MOVE, EVENT_ILLEGAL_MOVE, LEVEL_INFO
+from rules import get_move_rules, size_ranks, NO_RING
 
 
 class GameState:
     """封装游戏的所有动态状态。"""
 
-    def __init__(self):
+    def __init__(self, torus_sizes=TORUS_SIZES):
         # 创建柱子和圆环
         self.pillars = self._create_pillars()
-        self.tori = self._create_tori()
+        self.tori = self._create_tori(torus_sizes)
+        # 预编译的规则查找表及每个圆环的尺寸排名
+        self.size_ranks = size_ranks([torus.outer_radius for torus in self.tori])
+        self.rules = get_move_rules(max(self.size_ranks) + 1, len(self.pillars))
 
         # 拖拽状态
         self.dragging = False
         self.dragged_torus_index = -1
-        self.drag_offset = np.array([0.0, 0.0, 0.0])
+        self.drag_offset = (0.0, 0.0, 0.0)
         self.mouse_down_pos = (0, 0)
-        self.original_drag_position = np.array([0.0, 0.0, 0.0])
+        self.original_drag_position = (0.0, 0.0, 0.0)
         self.original_pillar_index = -1
         self.last_mouse_pos_for_drag = (0, 0)
         # 标记是否进入水平拖拽模式
         self.is_horizontal_drag_mode = False
+        # 拖拽开始时每根柱子上其它圆环中的顶层圆环索引
+        self.drag_pillar_tops = None
 
         # 游戏进程状态
         self.move_count = 0
@@ -30,25 +38,27 @@ class GameState:
         # UI 状态
         self.display_error_message = False
         self.error_message_start_time = 0.0
+        self.hint_message = None
+        self.hint_message_start_time = 0.0
 
     def _create_pillars(self):
         """创建并返回柱子对象列表。"""
         pillars = []
         angles = [0, 120, 240]
         for i, angle in enumerate(angles):
-            rad = np.radians(angle)
-            x = PILLAR_RADIUS * np.cos(rad)
-            z = PILLAR_RADIUS * np.sin(rad)
+            rad = math.radians(angle)
+            x = PILLAR_RADIUS * math.cos(rad)
+            z = PILLAR_RADIUS * math.sin(rad)
             pillars.append(Pillar(x, z, PILLAR_COLORS[i], PILLAR_LABELS[i]))
         return pillars
 
-    def _create_tori(self):
+    def _create_tori(self, torus_sizes):
         """在第一个柱子上创建并返回圆环对象列表。"""
         tori = []
         initial_pillar_x, initial_pillar_z = self.pillars[0].position
         # 按照内半径从大到小排序
         sorted_sizes = sorted(
-            TORUS_SIZES, key=lambda item: item[1], reverse=True)
+            torus_sizes, key=lambda item: item[1], reverse=True)
 
         last_y = 0.0
         last_inner_radius = 0.0
@@ -76,15 +86,11 @@ class GameState:
             if torus.animation_state != 'IDLE':
                 continue
             # 判断射线是否朝向圆环
-            torus_center = np.array(torus.position)
-            v = torus_center - ray_origin
-            t_proj = np.dot(v, ray_dir)
+            # 计算圆环中心在射线上的投影及其到射线的距离
+            t_proj, dist_to_center = ray_point_distance(
+                ray_origin, ray_dir, torus.position)
             if t_proj < 0:
                 continue
-            # 计算射线与圆环中心的最近点
-            closest_point_on_ray = ray_origin + t_proj * ray_dir
-            dist_to_center = np.linalg.norm(
-                torus_center - closest_point_on_ray)
             # 判断是否碰撞
             if dist_to_center < torus.outer_radius + torus.inner_radius:
                 # 判断该圆环是否为该柱子“最顶层”的圆环
@@ -110,27 +116,40 @@ class GameState:
 
         return topmost_ring_idx
 
+    def get_puzzle_state(self):
+        """返回供求解器使用的离散状态，圆环按尺寸从小到大排列。"""
+        state = []
+        for torus in self.tori:
+            pillar_idx = get_pillar_index_at_pos(
+                torus.position[0], torus.position[2], self.pillars)
+            state.append((pillar_idx, torus.orientation))
+        return tuple(state)
+
+    def is_idle(self):
+        """检查是否没有圆环在拖拽或动画中。"""
+        return self.dragged_torus_index == -1 and all(
+            torus.animation_state == 'IDLE' for torus in self.tori)
+
     def start_dragging(self, torus_index, ray_origin, ray_dir):
         """开始拖拽一个圆环。"""
 
         self.dragged_torus_index = torus_index
         torus = self.tori[torus_index]
         # 存放原始位置
-        self.original_drag_position = np.array(torus.position)
+        self.original_drag_position = tuple(torus.position)
         self.original_pillar_index = get_pillar_index_at_pos(
             torus.position[0], torus.position[2], self.pillars)
         # 记录开始拖拽时鼠标位置（用于判断是“水平拖拽”还是“垂直拖拽”）。
         self.last_mouse_pos_for_drag = self.mouse_down_pos
         self.is_horizontal_drag_mode = False
+        # 柱子顶层缓存在第一次高亮检查时生成
+        self.drag_pillar_tops = None
         # 用于计算鼠标射线与“水平面”相交的位置（圆环所在的 Y 层面）。
-        plane_normal = np.array([0, 1, 0])
-        denom = np.dot(ray_dir, plane_normal)
+        hit_point = ray_hit_height(ray_origin, ray_dir, torus.position[1])
         # 记录圆环中心相对鼠标命中点的偏移量（X/Z 方向），这样拖动时能让鼠标拖住的点与圆环保持一致。
-        if abs(denom) > 1e-6:
-            t = (torus.position[1] - ray_origin[1]) / denom
-            hit_point = ray_origin + t * ray_dir
-            self.drag_offset = torus.position - hit_point
-            self.drag_offset[1] = 0.0
+        if hit_point is not None:
+            self.drag_offset = (torus.position[0] - hit_point[0], 0.0,
+                                torus.position[2] - hit_point[2])
 
     def stop_dragging(self):
         """停止拖拽。"""
@@ -144,10 +163,11 @@ class GameState:
         # 重置拖拽状态
         self.dragging = False
         self.dragged_torus_index = -1
+        self.drag_pillar_tops = None
 
     def is_drag_active(self, mouse_pos):
         """检查拖拽是否已激活（移动超过阈值）。"""
-        return np.linalg.norm(np.array(mouse_pos) - np.array(self.mouse_down_pos)) > DRAG_THRESHOLD
+        return distance2d(mouse_pos[0], mouse_pos[1], self.mouse_down_pos[0], self.mouse_down_pos[1]) > DRAG_THRESHOLD
 
     def update_dragged_torus_position(self, ray_origin, ray_dir, mouse_pos):
         """更新被拖拽圆环的位置，实现两段式拖拽。"""
@@ -171,14 +191,10 @@ class GameState:
         # 水平移动阶段， y轴位置保持在 FLOAT_HEIGHT
         else:
             torus.position[1] = FLOAT_HEIGHT
-            plane_normal = np.array([0, 1, 0])
-            denom = np.dot(ray_dir, plane_normal)
-            if abs(denom) > 1e-6:
-                t = (FLOAT_HEIGHT - ray_origin[1]) / denom
-                hit = ray_origin + t * ray_dir
-                target_pos_raw = hit + self.drag_offset
-                torus.position[0] = target_pos_raw[0]
-                torus.position[2] = target_pos_raw[2]
+            hit = ray_hit_height(ray_origin, ray_dir, FLOAT_HEIGHT)
+            if hit is not None:
+                torus.position[0] = hit[0] + self.drag_offset[0]
+                torus.position[2] = hit[2] + self.drag_offset[2]
             # 检查当前拖拽位置的合法性
             self.check_highlight_validity()
 
@@ -211,49 +227,63 @@ class GameState:
     def is_move_valid(self, moving_torus_idx, target_pillar_idx, check_only=False):
         """检查一个移动是否合法。"""
         moving_torus = self.tori[moving_torus_idx]
-        # 如果不是原地翻转
-        if self.original_pillar_index != target_pillar_idx:
-            # 判断是否是顺时针 移动
-            expected_next_pillar = (
-                self.original_pillar_index + 1) % len(self.pillars)
-            # 如果目标柱子不是下一个顺时针柱子，则非法
-            if target_pillar_idx != expected_next_pillar:
-                if not check_only:
-                    print("Illegal move: Must move clockwise.")
-                return False
-        # 找出在该柱子上的其它圆环
-        rings_on_target = [t for t in self.tori if t is not moving_torus and get_pillar_index_at_pos(
-            t.position[0], t.position[2], self.pillars, threshold=0.9) == target_pillar_idx]
-        # 先进行翻转
-        future_flip_angle = (moving_torus.flip_angle + 180) % 360
-        # 获取翻转后的圆环底部颜色
-        moving_bottom_color = moving_torus.get_effective_bottom_color(
-            angle_override=future_flip_angle)
-        # 如果目标柱子上没有圆环，则可以放置
-        if not rings_on_target:
-            return True
+        # 起始位置不在任何柱子上时不能移动
+        if self.original_pillar_index == -1:
+            reason = ILLEGAL_NOT_CLOCKWISE
         else:
-            # 如果目标柱子上有圆环，获取顶部圆环
-            topmost_on_target = max(
-                rings_on_target, key=lambda t: t.position[1])
-            # 检查大小是否合法
-            if self.original_pillar_index != target_pillar_idx:
-                if moving_torus.outer_radius > topmost_on_target.outer_radius:
-                    if not check_only:
-                        print(
-                            "Illegal move: Cannot place larger ring on smaller one.")
-                    return False
-            # 检查颜色是否相同
-            # 获取目标柱子顶部圆环的顶部颜色
-            target_top_color = topmost_on_target.get_effective_top_color()
-            # 相同则不合法
-            if moving_bottom_color == target_top_color:
-                if not check_only:
-                    print("Illegal move: Color repulsion.")
-                return False
-
+            # 获取目标柱子上其它圆环中的顶层圆环；高亮检查使用拖拽开始时的缓存，
+            # 真正放置时按当前位置重新计算，与 get_landing_y 保持一致
+            top_index = self.get_pillar_top(
+                target_pillar_idx, moving_torus_idx, use_drag_cache=check_only)
+            if top_index == -1:
+                top_rank, top_orientation = NO_RING, 0
+            else:
+                top_rank = self.size_ranks[top_index]
+                top_orientation = self.tori[top_index].orientation
+            # 查表判断是否合法
+            reason = self.rules.check(
+                self.original_pillar_index, target_pillar_idx, self.size_ranks[moving_torus_idx],
+                moving_torus.orientation, top_rank, top_orientation)
+        if reason != MOVE_OK:
+            if not check_only:
+                self._report_illegal_move(
+                    moving_torus_idx, target_pillar_idx, reason)
+            return False
         return True
 
+    def get_pillar_top(self, pillar_idx, excluded_idx, use_drag_cache=False):
+        """返回柱子上除 excluded_idx 外最顶层圆环的索引，没有时返回 -1。"""
+        # 拖拽期间每帧的高亮检查复用缓存；只有其它圆环都静止时柱子顶层才不会变化，
+        # 有圆环仍在动画中（例如非法放置后正在复位）时丢弃缓存并重新计算
+        if use_drag_cache and excluded_idx == self.dragged_torus_index:
+            if any(torus.animation_state != 'IDLE'
+                   for i, torus in enumerate(self.tori) if i != excluded_idx):
+                self.drag_pillar_tops = None
+            elif self.drag_pillar_tops is None:
+                self.drag_pillar_tops = self._find_pillar_tops(excluded_idx)
+            if self.drag_pillar_tops is not None:
+                return self.drag_pillar_tops[pillar_idx]
+        return self._find_pillar_tops(excluded_idx)[pillar_idx]
+
+    def _find_pillar_tops(self, excluded_idx):
+        """计算每根柱子上除 excluded_idx 外最顶层圆环的索引。"""
+        tops = [-1] * len(self.pillars)
+        for i, torus in enumerate(self.tori):
+            if i == excluded_idx:
+                continue
+            pillar_idx = get_pillar_index_at_pos(
+                torus.position[0], torus.position[2], self.pillars, threshold=0.9)
+            if pillar_idx == -1:
+                continue
+            if tops[pillar_idx] == -1 or torus.position[1] > self.tori[tops[pillar_idx]].position[1]:
+                tops[pillar_idx] = i
+        return tops
+
+    def _report_illegal_move(self, moving_torus_idx, target_pillar_idx, reason):
+        """记录非法移动事件。"""
+        telemetry.emit(EVENT_ILLEGAL_MOVE, LEVEL_INFO, moving_torus_idx,
+                       self.original_pillar_index, target_pillar_idx, reason)
+
     def place_torus(self, current_time):
         """放置被拖拽的圆环，检查规则并触发相应动画。"""
         torus = self.tori[self.dragged_torus_index]
@@ -268,11 +298,12 @@ class GameState:
             torus.position[0] = target_pos_x
             torus.position[2] = target_pos_z
             # 翻转并下降
-            future_flip_angle = (torus.flip_angle + 180) % 360
-            torus.start_flip_animation(current_time, future_flip_angle)
+            torus.start_flip_animation(current_time)
             torus.start_descent_animation(current_time, target_y)
             # 步数加一
             self.move_count += 1
+            telemetry.emit(EVENT_MOVE, LEVEL_INFO, self.dragged_torus_index,
+                           self.original_pillar_index, target_pillar_idx, self.move_count)
         else:
             # 如果移动不合法，触发错误动画
             torus.start_error_revert(current_time, self.original_drag_position)
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from array import array
+from config import *
+from solver import build_distance_table, initial_state, solve, best_move
+
+# 缓存文件格式：第一行为 JSON 头（指纹、配置、初始状态的最优解），
+# 其后为小端序 uint16 距离表的原始字节。
+CACHE_FILE_SUFFIX = ".hcache"
+
+
+def config_fingerprint(torus_sizes=TORUS_SIZES, num_pillars=len(PILLAR_LABELS),
+                       rule_set_id=RULE_SET_ID, target_pillar_idx=WIN_PILLAR_INDEX):
+    """根据圆环尺寸、柱子数、规则集和缓存版本计算配置指纹。"""
+    key = {
+        "version": HINT_CACHE_VERSION,
+        "torus_sizes": [list(size) for size in torus_sizes],
+        "num_pillars": num_pillars,
+        "rule_set": rule_set_id,
+        "target_pillar": target_pillar_idx,
+    }
+    payload = json.dumps(key, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+
+class SolutionTables:
+    """某一配置下的距离表和初始状态的最优移动序列。"""
+
+    def __init__(self, num_rings, num_pillars, distances, solution):
+        self.num_rings = num_rings
+        self.num_pillars = num_pillars
+        self.distances = distances
+        self.solution = solution
+
+    def next_move(self, state):
+        """返回给定状态下的最优下一步，无解或已胜利时返回 None。"""
+        return best_move(state, self.distances, self.num_pillars)
+
+
+class HintCache:
+    """按配置指纹存放求解结果的磁盘缓存，支持多进程并发读取。"""
+
+    def __init__(self, cache_dir=HINT_CACHE_DIR, max_bytes=HINT_CACHE_MAX_BYTES):
+        # 按版本分目录，格式升级后旧文件不会被误读
+        self.cache_dir = os.path.join(cache_dir, f"v{HINT_CACHE_VERSION}")
+        self.max_bytes = max_bytes
+
+    def _path(self, fingerprint):
+        return os.path.join(self.cache_dir, fingerprint + CACHE_FILE_SUFFIX)
+
+    def load(self, fingerprint):
+        """读取缓存文件，不存在或损坏时返回 None。"""
+        path = self._path(fingerprint)
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline().decode("utf-8"))
+                data = f.read()
+        except (OSError, ValueError):
+            return None
+        if header.get("fingerprint") != fingerprint or header.get("version") != HINT_CACHE_VERSION:
+            return None
+        distances = array('H')
+        try:
+            distances.frombytes(data)
+        except ValueError:
+            return None
+        if sys.byteorder != "little":
+            distances.byteswap()
+        if len(distances) != (2 * header["num_pillars"]) ** header["num_rings"]:
+            return None
+        # 更新访问时间，供淘汰时判断最久未使用
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        solution = None if header["solution"] is None else [
+            tuple(move) for move in header["solution"]]
+        return SolutionTables(header["num_rings"], header["num_pillars"], distances, solution)
+
+    def store(self, fingerprint, tables):
+        """原子地写入缓存文件，写入失败时静默忽略。"""
+        header = {
+            "fingerprint": fingerprint,
+            "version": HINT_CACHE_VERSION,
+            "num_rings": tables.num_rings,
+            "num_pillars": tables.num_pillars,
+            "solution": tables.solution,
+        }
+        distances = array('H', tables.distances)
+        if sys.byteorder != "little":
+            distances.byteswap()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # 先写临时文件再替换，读者只会看到完整的文件
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(json.dumps(header).encode("utf-8") + b"\n")
+                    f.write(distances.tobytes())
+                os.replace(tmp_path, self._path(fingerprint))
+            except OSError:
+                os.remove(tmp_path)
+                raise
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self):
+        """总大小超过上限时，按最久未使用顺序删除缓存文件。"""
+        entries = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(CACHE_FILE_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # 其它进程可能已删除或正在使用该文件
+                continue
+            total -= size
+
+
+def load_or_build(torus_sizes=TORUS_SIZES, num_pillars=len(PILLAR_LABELS), cache=None):
+    """从缓存读取求解结果，未命中时求解并写入缓存。"""
+    cache = cache if cache is not None else HintCache()
+    fingerprint = config_fingerprint(torus_sizes, num_pillars)
+    tables = cache.load(fingerprint)
+    if tables is not None:
+        return tables
+
+    num_rings = len(torus_sizes)
+    distances = build_distance_table(num_rings, num_pillars)
+    solution = solve(initial_state(num_rings), distances, num_pillars)
+    tables = SolutionTables(num_rings, num_pillars, distances, solution)
+    cache.store(fingerprint, tables)
+    return tables
+
+
+class HintProvider:
+    """在第一次请求提示时才加载求解结果的提示提供者。"""
+
+    def __init__(self, torus_sizes=TORUS_SIZES, num_pillars=len(PILLAR_LABELS), cache=None):
+        self.torus_sizes = torus_sizes
+        self.num_pillars = num_pillars
+        self.cache = cache
+        self._tables = None
+
+    @property
+    def tables(self):
+        if self._tables is None:
+            self._tables = load_or_build(
+                self.torus_sizes, self.num_pillars, self.cache)
+        return self._tables
+
+    def next_move(self, state):
+        """返回给定状态下的最优下一步 (rank, target_pillar_idx)。"""
+        return self.tables.next_move(state)
@@ -0,0 +1,153 @@
+import json
+import statistics
+import struct
+import time
+import pygame
+from pygame.locals import *
+
+# 轨迹文件格式：文件头之后是定长记录。
+# 每帧先写一条 FRAME 记录（帧开始时间），其后是该帧内处理的输入事件。
+TRACE_MAGIC = b"MCHT"
+TRACE_VERSION = 1
+# 魔数、版本、窗口宽、窗口高
+TRACE_HEADER = struct.Struct("<4sHHH")
+# 类型、相对录制开始的时间（秒）、x、y、按键
+TRACE_RECORD = struct.Struct("<BfhhB")
+
+KIND_FRAME = 0
+KIND_BUTTON_DOWN = 1
+KIND_BUTTON_UP = 2
+KIND_MOTION = 3
+KIND_WHEEL = 4
+
+EVENT_KINDS = {
+    MOUSEBUTTONDOWN: KIND_BUTTON_DOWN,
+    MOUSEBUTTONUP: KIND_BUTTON_UP,
+    MOUSEMOTION: KIND_MOTION,
+    MOUSEWHEEL: KIND_WHEEL,
+}
+
+
+class TraceRecorder:
+    """把 GameApp.handle_events 处理的鼠标事件录制到紧凑的二进制轨迹文件。"""
+
+    def __init__(self, path, width, height):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.start_time = None
+        self.buffer = bytearray()
+
+    def record_frame(self, current_time, events):
+        """记录一帧的开始时间及其中的鼠标事件。"""
+        if self.start_time is None:
+            self.start_time = current_time
+        t = current_time - self.start_time
+        self.buffer += TRACE_RECORD.pack(KIND_FRAME, t, 0, 0, 0)
+        for event in events:
+            kind = EVENT_KINDS.get(event.type)
+            if kind is None:
+                continue
+            if kind == KIND_WHEEL:
+                x, y, button = event.x, event.y, 0
+            else:
+                (x, y), button = event.pos, getattr(event, "button", 0)
+            self.buffer += TRACE_RECORD.pack(kind, t, x, y, button)
+
+    def close(self):
+        """写出轨迹文件。"""
+        with open(self.path, "wb") as f:
+            f.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, self.width, self.height))
+            f.write(self.buffer)
+
+
+def load_trace(path):
+    """读取轨迹文件，返回 (窗口尺寸, 帧列表)，每帧为 (时间, 事件记录列表)。"""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, width, height = TRACE_HEADER.unpack_from(data, 0)
+    if magic != TRACE_MAGIC or version != TRACE_VERSION:
+        raise ValueError(f"{path} is not a version {TRACE_VERSION} input trace")
+    frames = []
+    for kind, t, x, y, button in TRACE_RECORD.iter_unpack(data[TRACE_HEADER.size:]):
+        if kind == KIND_FRAME:
+            frames.append((t, []))
+        elif frames:
+            frames[-1][1].append((kind, x, y, button))
+    return (width, height), frames
+
+
+def _to_pygame_event(kind, x, y, button):
+    if kind == KIND_BUTTON_DOWN:
+        return pygame.event.Event(MOUSEBUTTONDOWN, pos=(x, y), button=button)
+    if kind == KIND_BUTTON_UP:
+        return pygame.event.Event(MOUSEBUTTONUP, pos=(x, y), button=button)
+    if kind == KIND_MOTION:
+        return pygame.event.Event(MOUSEMOTION, pos=(x, y), rel=(0, 0), buttons=(0, 0, 0))
+    return pygame.event.Event(MOUSEWHEEL, x=x, y=y, flipped=False)
+
+
+class TraceReplayer:
+    """按录制的帧回放轨迹，可以按原速或尽可能快地回放。"""
+
+    def __init__(self, path, realtime=True):
+        self.screen_size, self.frames = load_trace(path)
+        self.realtime = realtime
+        self.frame_index = 0
+        # 回放使用虚拟时钟，保证动画进度与录制时一致
+        self.base_time = time.time()
+        self.start_wall_time = None
+
+    @property
+    def finished(self):
+        return self.frame_index >= len(self.frames)
+
+    def current_time(self):
+        """返回当前回放帧对应的游戏时间。"""
+        if self.frame_index == 0:
+            return self.base_time
+        return self.base_time + self.frames[self.frame_index - 1][0]
+
+    def next_frame_events(self):
+        """返回下一帧的事件；原速回放时会等到该帧的录制时间。"""
+        if self.finished:
+            return []
+        t, records = self.frames[self.frame_index]
+        if self.realtime:
+            if self.start_wall_time is None:
+                self.start_wall_time = time.perf_counter() - t
+            delay = self.start_wall_time + t - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        self.frame_index += 1
+        return [_to_pygame_event(*record) for record in records]
+
+
+def summarize_timings(timings):
+    """统计耗时分布（毫秒），用于帧耗时和输入延迟。"""
+    if not timings:
+        return {"count": 0}
+    ordered = sorted(timings)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(p / 100.0 * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.mean(ordered),
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "max_ms": ordered[-1],
+    }
+
+
+def write_frame_times(path, frame_times, trace_path, realtime):
+    """保存每帧耗时和统计结果，便于比较不同版本。"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "trace": trace_path,
+            "realtime": realtime,
+            "summary": summarize_timings(frame_times),
+            "frame_ms": frame_times,
+        }, f, indent=2)
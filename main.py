@@ -1,39 +1,127 @@
+import time
+# 启动计时起点，尽量早于其它导入
+STARTUP_TIME = time.perf_counter()
 import pygame
 from pygame.locals import *
 from OpenGL.GL import *
 from OpenGL.GLU import *
-import numpy as np
-import time
+import argparse
+from collections import deque
 from config import *
-from objects import Torus, Pillar
+from objects import Torus, Pillar, draw_torus
 from game_state import GameState
-from utils import get_mouse_ray, get_pillar_index_at_pos, check_win_condition, draw_text
+from hint_cache import HintProvider
+from telemetry import (telemetry, EVENT_SELECTION, EVENT_WIN, EVENT_FRAME, EVENT_INPUT_LATENCY,
+                       EVENT_STARTUP, LEVEL_DEBUG, LEVEL_INFO)
+from input_trace import TraceRecorder, TraceReplayer, summarize_timings, write_frame_times
+from simulation import RenderSnapshot, SnapshotBuffer, SimulationThread, TorusView
+from utils import camera_ray, get_pillar_index_at_pos, check_win_condition, draw_text, CachedFont
+from warmup import WarmupPipeline, WARMUP_MESHES, WARMUP_GLYPHS, WARMUP_HINTS
 
 
 class GameApp:
     """封装整个游戏应用的主类。"""
 
-    def __init__(self):
+    def __init__(self, record_path=None, replay_path=None, replay_realtime=True, timings_path=None,
+                 threaded=True, report_latency=False):
         """初始化游戏环境和状态。"""
-        pygame.init()
+        # 只初始化需要的 pygame 子系统，不初始化音频等
+        pygame.display.init()
+        pygame.font.init()
         self.width, self.height = 800, 600
         self.screen = pygame.display.set_mode(
             (self.width, self.height), DOUBLEBUF | OPENGL)
         pygame.display.set_caption("Magnetic Circulation Hanoi Tower - 3D")
         self.setup_opengl()
 
-        # 初始化字体
-        self.font_large = pygame.font.Font(None, 48)
-        self.font_medium = pygame.font.Font(None, 36)
+        # 初始化字体，文本像素按需缓存
+        self.font_large = CachedFont(48)
+        self.font_medium = CachedFont(36)
         self.clock = pygame.time.Clock()
 
         # 初始化游戏状态
         self.game_state = GameState()
         self.camera = {'yaw': 0.0, 'pitch': 0.0, 'distance': 25.0,
                        'right_dragging': False, 'last_mouse_pos': (0, 0)}
+        # 尽快显示包含柱子和标签的第一帧，圆环等资源随后逐步就绪
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glLoadIdentity()
+        self.draw_static_scene(
+            (self.camera['yaw'], self.camera['pitch'], self.camera['distance']))
+        pygame.display.flip()
+        self.first_frame_ms = (time.perf_counter() - STARTUP_TIME) * 1000.0
+        self.startup_reported = False
+
+        # 求解结果由后台预热加载
+        self.hint_provider = HintProvider()
+
+        # 后台预热网格、文本和提示表，完成后逐项启用
+        self.warmup = WarmupPipeline()
+        self.warmup.add(WARMUP_MESHES, self.warm_up_meshes)
+        self.warmup.add(WARMUP_GLYPHS, self.warm_up_glyphs)
+        self.warmup.add(WARMUP_HINTS, lambda: self.hint_provider.tables)
+        self.warmup.start()
 
         self.running = True
 
+        # 输入轨迹录制与回放
+        self.recorder = TraceRecorder(
+            record_path, self.width, self.height) if record_path else None
+        self.replayer = TraceReplayer(
+            replay_path, replay_realtime) if replay_path else None
+        self.replay_path = replay_path
+        self.timings_path = timings_path
+        # 游戏时间来源，回放时使用轨迹的虚拟时钟
+        self.time_source = self.replayer.current_time if self.replayer else time.time
+        # 回放时收集每帧耗时（毫秒）
+        self.frame_times = []
+
+        # 模拟步数
+        self.sim_tick = 0
+        # 已处理的输入批次序号及其采集时间，用于测量输入到显示的延迟
+        self.input_seq = 0
+        self.input_time = None
+        self.last_rendered_input_seq = 0
+        self.input_latencies = deque(maxlen=10000)
+        self.report_latency = report_latency
+        # 模拟线程发布、渲染循环读取的双缓冲快照
+        self.snapshots = SnapshotBuffer(self.build_snapshot())
+        # 模拟线程；单线程模式下在渲染循环中直接执行模拟。
+        # 回放的虚拟时钟按渲染帧推进，必须与输入在同一线程中处理才能复现录制结果
+        self.simulation = SimulationThread(self) if threaded and self.replayer is None else None
+        # 启动遥测后台写出线程
+        telemetry.start()
+
+    def warm_up_meshes(self):
+        """生成所有圆环的表面网格。"""
+        for torus in self.game_state.tori:
+            torus.get_mesh()
+
+    def warm_up_glyphs(self):
+        """预先栅格化常用的UI文本。"""
+        white = (255, 255, 255)
+        self.font_medium.prewarm([(label, white) for label in PILLAR_LABELS] +
+                                 [(f"Moves: {n}", white) for n in range(100)])
+        self.font_large.prewarm([(ERROR_MESSAGE_TEXT, (255, 0, 0)), ("You Win!", (0, 255, 0))])
+
+    def ready_ms(self, name):
+        """返回某项预热任务完成时距启动的毫秒数，未完成时返回 -1。"""
+        ready_time = self.warmup.ready_times.get(name)
+        if ready_time is None:
+            return -1.0
+        return (ready_time - STARTUP_TIME) * 1000.0
+
+    def report_startup(self):
+        """所有预热任务结束后记录首帧时间、可交互时间和各项功能的就绪时间。"""
+        durations = self.warmup.durations
+        # 网格就绪后圆环才能显示和拾取，此时即可交互
+        telemetry.emit(EVENT_STARTUP, LEVEL_INFO, self.first_frame_ms,
+                       self.ready_ms(WARMUP_MESHES),
+                       durations.get(WARMUP_MESHES, -1.0), durations.get(WARMUP_GLYPHS, -1.0),
+                       durations.get(WARMUP_HINTS, -1.0),
+                       self.ready_ms(WARMUP_GLYPHS), self.ready_ms(WARMUP_HINTS))
+        self.startup_reported = True
+
     def setup_opengl(self):
         """配置OpenGL初始设置。"""
         glEnable(GL_DEPTH_TEST)
@@ -43,17 +131,44 @@ class GameApp:
         # 设置投影矩阵
         glMatrixMode(GL_PROJECTION)
         glLoadIdentity()
-        gluPerspective(45, self.width / self.height, 0.1, 100.0)
+        gluPerspective(CAMERA_FOV, self.width / self.height,
+                       CAMERA_NEAR, CAMERA_FAR)
         glMatrixMode(GL_MODELVIEW)
 
     def handle_events(self):
-        """处理所有的用户输入事件。"""
-        current_time = time.time()
-        for event in pygame.event.get():
-            if event.type == QUIT:
-                self.running = False
+        """采集所有的用户输入事件，交给模拟线程或直接处理。"""
+        events = pygame.event.get()
+        if self.replayer is not None:
+            # 回放时只响应退出事件，其余输入来自轨迹
+            events = [event for event in events if event.type == QUIT] + \
+                self.replayer.next_frame_events()
+        input_time = time.perf_counter()
+        if self.recorder is not None:
+            self.recorder.record_frame(self.time_source(), events)
+        # 退出事件在渲染线程直接处理
+        if any(event.type == QUIT for event in events):
+            self.running = False
+            events = [event for event in events if event.type != QUIT]
+
+        if self.simulation is not None:
+            self.simulation.submit(events, input_time)
+        else:
+            self.simulation_step(events, input_time if events else None)
 
-            elif event.type == MOUSEBUTTONDOWN:
+    def simulation_step(self, events, input_time):
+        """处理一批输入、推进动画和规则检查，并发布渲染快照。"""
+        self.process_input(events, self.time_source())
+        if input_time is not None:
+            self.input_seq += 1
+            self.input_time = input_time
+        self.update()
+        self.sim_tick += 1
+        self.snapshots.publish(self.build_snapshot())
+
+    def process_input(self, events, current_time):
+        """把输入事件分发给对应的处理函数。"""
+        for event in events:
+            if event.type == MOUSEBUTTONDOWN:
                 self.handle_mouse_down(event, current_time)
 
             elif event.type == MOUSEBUTTONUP:
@@ -62,19 +177,50 @@ class GameApp:
             elif event.type == MOUSEMOTION:
                 self.handle_mouse_motion(event)
 
+            elif event.type == KEYDOWN:
+                self.handle_key_down(event, current_time)
+
+    def handle_key_down(self, event, current_time):
+        """处理键盘按下事件。"""
+        # H 键请求提示
+        if event.key == K_h:
+            self.show_hint(current_time)
+
+    def show_hint(self, current_time):
+        """计算并显示下一步的最优移动。"""
+        # 游戏结束或圆环仍在移动时不提示
+        if self.game_state.game_won or not self.game_state.is_idle():
+            return
+        if not self.warmup.is_ready(WARMUP_HINTS):
+            self.game_state.hint_message = "Hints loading..."
+            self.game_state.hint_message_start_time = current_time
+            return
+        puzzle_state = self.game_state.get_puzzle_state()
+        move = self.hint_provider.next_move(puzzle_state)
+        if move is None:
+            self.game_state.hint_message = "No hint available"
+        else:
+            rank, target_pillar_idx = move
+            source_label = PILLAR_LABELS[puzzle_state[rank][0]]
+            target_label = PILLAR_LABELS[target_pillar_idx]
+            if source_label == target_label:
+                self.game_state.hint_message = f"Hint: flip ring {rank + 1} on {target_label}"
+            else:
+                self.game_state.hint_message = f"Hint: ring {rank + 1} {source_label} -> {target_label}"
+        self.game_state.hint_message_start_time = current_time
+
     def handle_mouse_down(self, event, current_time):
         """处理鼠标按下事件。"""
         # 左键点击拖拽圆环
         if event.button == 1:
-            # 如果游戏已经结束，则不处理鼠标事件
-            if self.game_state.game_won:
+            # 如果游戏已经结束或圆环尚未显示，则不处理鼠标事件
+            if self.game_state.game_won or not self.warmup.is_ready(WARMUP_MESHES):
                 return
             mx, my = event.pos
             # 传递鼠标位置
             self.game_state.mouse_down_pos = (mx, my)
             # 获取鼠标射线
-            ray_origin, ray_dir = get_mouse_ray(
-                mx, my, self.width, self.height)
+            ray_origin, ray_dir = self.mouse_ray(mx, my)
             # 检查是否点击了圆环
             topmost_ring_idx = self.game_state.find_topmost_colliding_torus(
                 ray_origin, ray_dir)
@@ -82,8 +228,8 @@ class GameApp:
             if topmost_ring_idx != -1:
                 self.game_state.start_dragging(
                     topmost_ring_idx, ray_origin, ray_dir)
-                print(
-                    f"DEBUG: Selected ring {topmost_ring_idx}, original pillar: {self.game_state.original_pillar_index}")
+                telemetry.emit(EVENT_SELECTION, LEVEL_DEBUG, topmost_ring_idx,
+                               self.game_state.original_pillar_index)
         # 右键点击移动视角
         elif event.button == 3:
             self.camera['right_dragging'] = True
@@ -94,6 +240,11 @@ class GameApp:
         elif event.button == 5:
             self.camera['distance'] = min(50, self.camera['distance'] + 1.0)
 
+    def mouse_ray(self, mx, my):
+        """根据当前相机参数计算鼠标射线，不需要 OpenGL 上下文。"""
+        return camera_ray(mx, my, self.width, self.height, self.camera['yaw'],
+                          self.camera['pitch'], self.camera['distance'])
+
     def handle_mouse_up(self, event, current_time):
         """处理鼠标松开事件。"""
         # 左键松开放置圆环
@@ -115,8 +266,7 @@ class GameApp:
         if self.game_state.dragged_torus_index != -1 and self.game_state.is_drag_active(event.pos):
             self.game_state.dragging = True
             mx, my = event.pos
-            ray_origin, ray_dir = get_mouse_ray(
-                mx, my, self.width, self.height)
+            ray_origin, ray_dir = self.mouse_ray(mx, my)
             # 传递 event.pos 用于计算拖拽
             self.game_state.update_dragged_torus_position(
                 ray_origin, ray_dir, event.pos)
@@ -132,58 +282,93 @@ class GameApp:
 
     def update(self):
         """更新游戏状态，如动画和胜利条件。"""
-        current_time = time.time()
+        current_time = self.time_source()
         for torus in self.game_state.tori:
             torus.update_animation(current_time)
 
         if not self.game_state.game_won:
             if check_win_condition(self.game_state.tori, self.game_state.pillars, WIN_PILLAR_INDEX):
                 self.game_state.game_won = True
-                print(f"游戏胜利！总步数: {self.game_state.move_count}")
+                telemetry.emit(EVENT_WIN, LEVEL_INFO,
+                               self.game_state.move_count)
 
-    def render(self):
-        """渲染所有游戏对象和UI。R"""
-        current_time = time.time()
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        glLoadIdentity()
+    def build_snapshot(self):
+        """根据当前游戏状态生成不可变的渲染快照。"""
+        game_state = self.game_state
+        tori = tuple(
+            TorusView(torus.mesh, tuple(torus.position), torus.flip_angle,
+                      # 检查是否需要高亮显示
+                      (i == game_state.dragged_torus_index and torus.is_highlighted) or
+                      torus.animation_state in ('FLIPPING', 'DESCENDING'))
+            for i, torus in enumerate(game_state.tori))
+        return RenderSnapshot(
+            tick=self.sim_tick,
+            tori=tori,
+            camera=(self.camera['yaw'], self.camera['pitch'], self.camera['distance']),
+            move_count=game_state.move_count,
+            game_won=game_state.game_won,
+            display_error_message=game_state.display_error_message,
+            error_message_start_time=game_state.error_message_start_time,
+            hint_message=game_state.hint_message,
+            hint_message_start_time=game_state.hint_message_start_time,
+            input_seq=self.input_seq,
+            input_time=self.input_time)
 
-        # 相机变换
-        glTranslatef(0, 0, -self.camera['distance'])
-        glRotatef(self.camera['pitch'], 1, 0, 0)
-        glRotatef(self.camera['yaw'], 0, 1, 0)
+    def draw_static_scene(self, camera):
+        """应用相机变换并绘制柱子和标签。"""
+        yaw, pitch, distance = camera
+        glTranslatef(0, 0, -distance)
+        glRotatef(pitch, 1, 0, 0)
+        glRotatef(yaw, 0, 1, 0)
 
-        # 绘制柱子和标签
         for pillar in self.game_state.pillars:
             pillar.draw()
             draw_text(
                 pillar.label, (pillar.position[0], -0.5, pillar.position[1]), self.font_medium, (self.width, self.height))
 
-        # 绘制圆环
-        for i, torus in enumerate(self.game_state.tori):
-            # 检查是否需要高亮显示
-            is_highlighted_for_draw = (i == self.game_state.dragged_torus_index and torus.is_highlighted) or torus.animation_state in [
-                'FLIPPING', 'DESCENDING']
-            torus.draw(is_highlighted_for_draw)
+    def render(self, snapshot):
+        """根据快照渲染所有游戏对象和UI。"""
+        current_time = self.time_source()
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glLoadIdentity()
+        self.draw_static_scene(snapshot.camera)
+
+        # 绘制圆环，网格预热完成前跳过
+        for torus in snapshot.tori:
+            if torus.mesh is not None:
+                draw_torus(torus.mesh, torus.position,
+                           torus.flip_angle, torus.is_highlighted)
 
         # 绘制UI文本
-        self.render_ui(current_time)
+        self.render_ui(snapshot, current_time)
 
         pygame.display.flip()
 
-    def render_ui(self, current_time):
+        # 记录输入到显示的延迟
+        if snapshot.input_seq != self.last_rendered_input_seq:
+            self.last_rendered_input_seq = snapshot.input_seq
+            latency_ms = (time.perf_counter() - snapshot.input_time) * 1000.0
+            self.input_latencies.append(latency_ms)
+            telemetry.emit(EVENT_INPUT_LATENCY, LEVEL_DEBUG, latency_ms)
+
+    def render_ui(self, snapshot, current_time):
         """渲染UI元素，如错误信息、步数和胜利消息。"""
         # 绘制错误信息
-        if self.game_state.display_error_message and (current_time - self.game_state.error_message_start_time < ERROR_MESSAGE_DURATION):
+        if snapshot.display_error_message and (current_time - snapshot.error_message_start_time < ERROR_MESSAGE_DURATION):
             draw_text(ERROR_MESSAGE_TEXT, (self.width // 2, self.height // 2 - 50),
                       self.font_large, (self.width, self.height), is_ui=True, color=(255, 0, 0))
+        # 绘制提示信息
+        if snapshot.hint_message and (current_time - snapshot.hint_message_start_time < HINT_MESSAGE_DURATION):
+            draw_text(snapshot.hint_message, (self.width // 2, self.height - 40),
+                      self.font_medium, (self.width, self.height), is_ui=True, color=(255, 255, 0))
         # 绘制步数
-        move_text = f"Moves: {self.game_state.move_count}"
+        move_text = f"Moves: {snapshot.move_count}"
         draw_text(move_text, (10, 10), self.font_medium, (self.width,
                   self.height), is_ui=True, color=(255, 255, 255), align="topleft")
         # 绘制游戏胜利消息
-        if self.game_state.game_won:
+        if snapshot.game_won:
             win_message = "You Win!"
-            win_moves_message = f"Total Moves: {self.game_state.move_count}"
+            win_moves_message = f"Total Moves: {snapshot.move_count}"
             draw_text(win_message, (self.width // 2, self.height // 2 - 50),
                       self.font_large, (self.width, self.height), is_ui=True, color=(0, 255, 0))
             draw_text(win_moves_message, (self.width // 2, self.height // 2 + 10),
@@ -191,14 +376,72 @@ class GameApp:
 
     def run(self):
         """游戏主循环。"""
+        if self.simulation is not None:
+            self.simulation.start()
+        # 预热完成前的点击会被忽略，回放需要等资源就绪后再开始才能复现录制结果
+        if self.replayer is not None:
+            self.warmup.wait()
         while self.running:
+            frame_start = time.perf_counter()
             self.handle_events()
-            self.update()
-            self.render()
+            # 只读取最新快照，不与模拟线程加锁
+            self.render(self.snapshots.latest())
+            if not self.startup_reported and self.warmup.finished:
+                self.report_startup()
+            frame_ms = (time.perf_counter() - frame_start) * 1000.0
+            # 帧耗时按 TELEMETRY_SAMPLE_EVERY 采样，默认级别下也会写出
+            telemetry.emit(EVENT_FRAME, LEVEL_INFO, frame_ms)
+            if self.replayer is not None:
+                self.frame_times.append(frame_ms)
+                if self.replayer.finished:
+                    self.running = False
+                # 尽快回放时不限制帧率
+                if not self.replayer.realtime:
+                    continue
             self.clock.tick(60)
+        if self.simulation is not None:
+            self.simulation.stop()
+        self.finish()
         pygame.quit()
+        if self.simulation is not None and self.simulation.error is not None:
+            raise self.simulation.error
+
+    def finish(self):
+        """保存录制的轨迹和回放的帧耗时，并关闭遥测。"""
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.report_latency and self.input_latencies:
+            mode = "threaded" if self.simulation is not None else "single-thread"
+            print(f"Input latency ({mode}): {summarize_timings(self.input_latencies)}")
+        if self.replayer is not None:
+            summary = summarize_timings(self.frame_times)
+            print(f"Replay frame times: {summary}")
+            if self.timings_path:
+                write_frame_times(self.timings_path, self.frame_times,
+                                  self.replay_path, self.replayer.realtime)
+        telemetry.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Magnetic Circulation Hanoi Tower - 3D")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record mouse input to a trace file")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="replay a recorded trace instead of live input")
+    parser.add_argument("--fast", action="store_true",
+                        help="replay as fast as possible instead of at recorded speed")
+    parser.add_argument("--timings", metavar="PATH",
+                        help="write per-frame replay timings as JSON")
+    parser.add_argument("--single-thread", action="store_true",
+                        help="run simulation on the render thread (for latency comparison)")
+    parser.add_argument("--latency", action="store_true",
+                        help="print an input-to-display latency summary on exit")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    app = GameApp()
+    args = parse_args()
+    app = GameApp(record_path=args.record, replay_path=args.replay,
+                  replay_realtime=not args.fast, timings_path=args.timings,
+                  threaded=not args.single_thread, report_latency=args.latency)
     app.run()
@@ -1,6 +1,64 @@
-import numpy as np
+import math
 from OpenGL.GL import *
 from config import *
+from fastmath import ease_in_out, lerp
+
+
+# 圆环两面的颜色及其暗色调
+TORUS_RED = (1.0, 0.0, 0.0)
+TORUS_BLUE = (0.0, 0.0, 1.0)
+TORUS_RED_DARK = tuple(c * DARK_FACTOR for c in TORUS_RED)
+TORUS_BLUE_DARK = tuple(c * DARK_FACTOR for c in TORUS_BLUE)
+
+
+def build_torus_mesh(inner_radius, outer_radius, segments=TORUS_SEGMENTS):
+    """生成圆环表面的四边形带，每个顶点为 (x, y, z, 是否为红色面)。"""
+    strips = []
+    # 圆环表面建模：双层循环生成四边形带
+    for i in range(segments):
+        strip = []
+        for j in range(segments + 1):
+            for k in [i, i + 1]:
+                # 计算圆环表面点的参数
+                # k 是环的索引，j 是圆环表面点的索引
+                s = k % segments + 0.5
+                t = j % segments
+                theta = 2 * math.pi * s / segments
+                phi = 2 * math.pi * t / segments
+                # 计算圆环表面点的坐标
+                x = (outer_radius + inner_radius *
+                     math.cos(phi)) * math.cos(theta)
+                y = (outer_radius + inner_radius *
+                     math.cos(phi)) * math.sin(theta)
+                z = inner_radius * math.sin(phi)
+                # 颜色基于角度的正弦值变化
+                strip.append((x, y, z, math.sin(phi) >= 0))
+        strips.append(strip)
+    return strips
+
+
+def draw_torus(mesh, position, flip_angle, is_highlighted):
+    """按给定的位置和翻转角度绘制圆环网格，不读取圆环对象的状态。"""
+    # 保存当前矩阵
+    glPushMatrix()
+    # 绘图位置移动圆环中心点
+    glTranslatef(*position)
+    # 绕x轴旋转，让圆环从平面朝上变成立体朝外
+    glRotatef(90, 1, 0, 0)
+    # 绕y轴旋转
+    glRotatef(flip_angle, 0, 1, 0)
+
+    # 如果是高亮状态，使用原色，否则使用暗色
+    red, blue = (TORUS_RED, TORUS_BLUE) if is_highlighted else (
+        TORUS_RED_DARK, TORUS_BLUE_DARK)
+    # 按预先生成的网格绘制四边形带
+    for strip in mesh:
+        glBegin(GL_QUAD_STRIP)
+        for x, y, z, is_red in strip:
+            glColor3f(*(red if is_red else blue))
+            glVertex3f(x, y, z)
+        glEnd()
+    glPopMatrix()
 
 
 class Torus:
@@ -10,6 +68,9 @@ class Torus:
         self.outer_radius = outer_radius
         self.position = list(initial_position)
         self.flip_angle = 0.0
+        # 朝向：0 表示顶部为红色，1 表示翻转后顶部为蓝色
+        # 规则判断只使用朝向，flip_angle 仅用于绘制翻转动画
+        self.orientation = 0
         # 'IDLE', 'FLIPPING', 'DESCENDING', 'ERROR_PAUSE', 'REVERTING'
         # 常态 , 翻转中 , 下降中 , 错误暂停 , 恢复中
         self.animation_state = 'IDLE'
@@ -37,71 +98,14 @@ class Torus:
         self.revert_initial_pos = [0.0, 0.0, 0.0]
         # 错误恢复目标位置
         self.target_revert_position = [0.0, 0.0, 0.0]
+        # 表面网格，第一次绘制时生成
+        self.mesh = None
 
-    def draw(self, is_highlighted=False):
-        """绘制圆环。"""
-        # 更新高亮状态
-        self.is_highlighted = is_highlighted
-        # 保存当前矩阵
-        glPushMatrix()
-        # 绘图位置移动圆环中心点
-        glTranslatef(*self.position)
-        # 绕x轴旋转，让圆环从平面朝上变成立体朝外
-        glRotatef(90, 1, 0, 0)
-        # 绕y轴旋转
-        glRotatef(self.flip_angle, 0, 1, 0)
-
-        # 圆环表面建模：双层循环绘制四边形带
-        for i in range(30):
-            glBegin(GL_QUAD_STRIP)
-            for j in range(31):
-                for k in [i, i + 1]:
-                    # 计算圆环表面点的参数
-                    # k 是环的索引，j 是圆环表面点的索引
-                    s = k % 30 + 0.5
-                    t = j % 30
-                    theta = 2 * np.pi * s / 30
-                    phi = 2 * np.pi * t / 30
-                    # 计算圆环表面点的坐标
-                    x = (self.outer_radius + self.inner_radius *
-                         np.cos(phi)) * np.cos(theta)
-                    y = (self.outer_radius + self.inner_radius *
-                         np.cos(phi)) * np.sin(theta)
-                    z = self.inner_radius * np.sin(phi)
-                    # 颜色基于角度的正弦值变化
-                    base_color = (1.0, 0.0, 0.0) if np.sin(
-                        phi) >= 0 else (0.0, 0.0, 1.0)
-                    # 如果是高亮状态，使用原色，否则使用暗色
-                    if self.is_highlighted:
-                        glColor3f(*base_color)
-                    else:
-                        # 使用暗色调
-                        glColor3f(base_color[0] * DARK_FACTOR, base_color[1]
-                                  * DARK_FACTOR, base_color[2] * DARK_FACTOR)
-                    # 绘制顶点
-                    glVertex3f(x, y, z)
-            glEnd()
-        glPopMatrix()
-
-    def get_effective_top_color(self, angle_override=None):
-        """获取当前有效的顶部颜色。"""
-        # 如果提供了角度覆盖，则使用它，否则使用当前翻转角度
-        angle = angle_override if angle_override is not None else self.flip_angle
-        # 检查角度是否接近180度
-        # 如果接近180度，则返回蓝色，否则返回红色
-        if np.isclose(angle % 360, 180.0, atol=ANGLE_TOLERANCE):
-            return COLOR_BLUE
-        return COLOR_RED
-
-    def get_effective_bottom_color(self, angle_override=None):
-        """获取当前有效的底部颜色。"""
-        # 如果提供了角度覆盖，则使用它，否则使用当前翻转角度
-        angle = angle_override if angle_override is not None else self.flip_angle
-        # 检查角度是否接近180度
-        # 如果接近180度，则返回红色，否则返回蓝色
-        if np.isclose(angle % 360, 180.0, atol=ANGLE_TOLERANCE):
-            return COLOR_RED
-        return COLOR_BLUE
+    def get_mesh(self):
+        """返回圆环表面网格，需要时才生成。"""
+        if self.mesh is None:
+            self.mesh = build_torus_mesh(self.inner_radius, self.outer_radius)
+        return self.mesh
 
     def update_animation(self, current_time):
         """根据当前时间更新动画。"""
@@ -111,9 +115,9 @@ class Torus:
             progress = min(
                 1.0, (current_time - self.flip_start_time) / FLIP_DURATION)
             # 使用平滑的余弦函数来计算进度，使得动画在开始和结束时更平滑
-            smoothed_progress = 0.5 - 0.5 * np.cos(progress * np.pi)
-            self.flip_angle = self.flip_initial_angle + \
-                (self.flip_target_angle - self.flip_initial_angle) * smoothed_progress
+            smoothed_progress = ease_in_out(progress)
+            self.flip_angle = lerp(
+                self.flip_initial_angle, self.flip_target_angle, smoothed_progress)
             # 如果进度达到1.0，表示翻转完成
             if progress >= 1.0:
                 # 将角度归一化到0-360度范围内
@@ -127,9 +131,9 @@ class Torus:
             progress = min(
                 1.0, (current_time - self.descent_start_time) / DESCENT_DURATION)
             # 使用平滑的余弦函数来计算下降进度
-            smoothed_progress = 0.5 - 0.5 * np.cos(progress * np.pi)
-            self.position[1] = self.descent_initial_y + \
-                (self.descent_target_y - self.descent_initial_y) * smoothed_progress
+            smoothed_progress = ease_in_out(progress)
+            self.position[1] = lerp(
+                self.descent_initial_y, self.descent_target_y, smoothed_progress)
             if progress >= 1.0:
                 self.position[1] = self.descent_target_y
                 self.animation_state = 'IDLE'
@@ -143,12 +147,12 @@ class Torus:
         elif self.animation_state == 'REVERTING':
             progress = min(
                 1.0, (current_time - self.revert_start_time) / REVERT_ANIMATION_DURATION)
-            smoothed_progress = 0.5 - 0.5 * np.cos(progress * np.pi)
+            smoothed_progress = ease_in_out(progress)
 
             # 先处理x和z轴的平移 (索引0和2)
             for i in [0, 2]:
-                self.position[i] = self.revert_initial_pos[i] + (
-                    self.target_revert_position[i] - self.revert_initial_pos[i]) * smoothed_progress
+                self.position[i] = lerp(
+                    self.revert_initial_pos[i], self.target_revert_position[i], smoothed_progress)
 
             # 当x和z轴的平移完成后，开始处理y轴的平移
             if progress >= 1.0:
@@ -162,11 +166,11 @@ class Torus:
         elif self.animation_state == 'REVERTING_Y':
             y_progress = min(
                 1.0, (current_time - self.y_revert_start_time) / REVERT_ANIMATION_DURATION)
-            smoothed_y_progress = 0.5 - 0.5 * np.cos(y_progress * np.pi)
+            smoothed_y_progress = ease_in_out(y_progress)
 
             # 处理y轴的平移
-            self.position[1] = self.y_revert_initial_pos + (
-                self.target_y_revert_position - self.y_revert_initial_pos) * smoothed_y_progress
+            self.position[1] = lerp(
+                self.y_revert_initial_pos, self.target_y_revert_position, smoothed_y_progress)
 
             if y_progress >= 1.0:
                 # y轴平移完成，设置最终位置并回到空闲状态
@@ -174,11 +178,13 @@ class Torus:
                 self.animation_state = 'IDLE'
 
     # 翻转动画
-    def start_flip_animation(self, current_time, target_angle):
+    def start_flip_animation(self, current_time):
         self.animation_state = 'FLIPPING'
         self.flip_start_time = current_time
+        # 朝向立即翻转，角度始终向前转半圈，完成后再归一化
+        self.orientation = 1 - self.orientation
         self.flip_initial_angle = self.flip_angle
-        self.flip_target_angle = target_angle
+        self.flip_target_angle = self.flip_angle + 180.0
     # 下降动画
 
     def start_descent_animation(self, current_time, target_y):
@@ -210,10 +216,10 @@ class Pillar:
         for i in range(slices):
             # 计算每个切片的角度
             # theta1 和 theta2 分别是当前切片和下一个切片的角度
-            theta1 = 2 * np.pi * i / slices
-            theta2 = 2 * np.pi * (i + 1) / slices
-            x1, z1 = 0.3 * np.cos(theta1), 0.3 * np.sin(theta1)
-            x2, z2 = 0.3 * np.cos(theta2), 0.3 * np.sin(theta2)
+            theta1 = 2 * math.pi * i / slices
+            theta2 = 2 * math.pi * (i + 1) / slices
+            x1, z1 = 0.3 * math.cos(theta1), 0.3 * math.sin(theta1)
+            x2, z2 = 0.3 * math.cos(theta2), 0.3 * math.sin(theta2)
             glBegin(GL_QUADS)
             # 绘制柱子的侧面
             glVertex3f(x1, 0, z1)
@@ -0,0 +1,77 @@
+from functools import lru_cache
+from config import *
+
+# 移动是否合法只取决于一个很小的离散键：
+# (起始柱子, 目标柱子, 移动圆环的尺寸排名, 移动圆环的朝向,
+#  目标柱子顶层圆环的尺寸排名, 目标柱子顶层圆环的朝向)
+# 启动时把所有组合的结果编译成一张稠密查找表，交互游戏、机器人和求解器共用。
+
+# 目标柱子为空时使用的顶层圆环排名
+NO_RING = -1
+
+
+def evaluate_move(source_pillar_idx, target_pillar_idx, rank, orientation,
+                  top_rank, top_orientation, num_pillars):
+    """直接按规则判断一次移动，返回 MOVE_OK 或非法原因。"""
+    # 只能原地翻转或顺时针移动到下一根柱子
+    if target_pillar_idx != source_pillar_idx and \
+            target_pillar_idx != (source_pillar_idx + 1) % num_pillars:
+        return ILLEGAL_NOT_CLOCKWISE
+    # 目标柱子上没有圆环，可以放置
+    if top_rank == NO_RING:
+        return MOVE_OK
+    # 不能把大圆环放在小圆环上（原地翻转除外）
+    if target_pillar_idx != source_pillar_idx and rank > top_rank:
+        return ILLEGAL_LARGER_ON_SMALLER
+    # 翻转后的底部颜色与目标顶部颜色相同则相斥，等价于移动前两者朝向相同
+    if orientation == top_orientation:
+        return ILLEGAL_COLOR_REPULSION
+    return MOVE_OK
+
+
+class MoveRules:
+    """预编译的移动合法性查找表。"""
+
+    def __init__(self, num_ranks, num_pillars):
+        self.num_ranks = num_ranks
+        self.num_pillars = num_pillars
+        size = num_pillars * num_pillars * num_ranks * 2 * (num_ranks + 1) * 2
+        self.table = bytearray(size)
+        for source_pillar_idx in range(num_pillars):
+            for target_pillar_idx in range(num_pillars):
+                for rank in range(num_ranks):
+                    for orientation in (0, 1):
+                        for top_rank in range(NO_RING, num_ranks):
+                            for top_orientation in (0, 1):
+                                index = self.index(source_pillar_idx, target_pillar_idx, rank,
+                                                   orientation, top_rank, top_orientation)
+                                self.table[index] = evaluate_move(
+                                    source_pillar_idx, target_pillar_idx, rank, orientation,
+                                    top_rank, top_orientation, num_pillars)
+
+    def index(self, source_pillar_idx, target_pillar_idx, rank, orientation,
+              top_rank, top_orientation):
+        """计算查找表中的位置。"""
+        index = source_pillar_idx * self.num_pillars + target_pillar_idx
+        index = index * self.num_ranks + rank
+        index = index * 2 + orientation
+        index = index * (self.num_ranks + 1) + top_rank + 1
+        return index * 2 + top_orientation
+
+    def check(self, source_pillar_idx, target_pillar_idx, rank, orientation,
+              top_rank=NO_RING, top_orientation=0):
+        """返回 MOVE_OK 或非法原因。"""
+        return self.table[self.index(source_pillar_idx, target_pillar_idx, rank,
+                                     orientation, top_rank, top_orientation)]
+
+
+@lru_cache(maxsize=None)
+def get_move_rules(num_ranks, num_pillars=len(PILLAR_LABELS)):
+    """返回共享的查找表，每种尺寸配置只编译一次。"""
+    return MoveRules(num_ranks, num_pillars)
+
+
+def size_ranks(outer_radii):
+    """按外半径计算尺寸排名，外半径相同的圆环排名相同。"""
+    distinct = sorted(set(outer_radii))
+    return [distinct.index(radius) for radius in outer_radii]
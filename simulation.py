@@ -0,0 +1,103 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+from config import *
+
+# 渲染所需的圆环状态
+TorusView = namedtuple("TorusView", ["mesh", "position", "flip_angle", "is_highlighted"])
+
+# 模拟线程发布给渲染循环的不可变快照
+RenderSnapshot = namedtuple("RenderSnapshot", [
+    # 模拟步数
+    "tick",
+    # 圆环变换，元素为 TorusView
+    "tori",
+    # 相机参数 (yaw, pitch, distance)
+    "camera",
+    # UI 状态
+    "move_count",
+    "game_won",
+    "display_error_message",
+    "error_message_start_time",
+    "hint_message",
+    "hint_message_start_time",
+    # 最近一批已处理输入的序号及其采集时间（perf_counter），用于测量输入到显示的延迟
+    "input_seq",
+    "input_time",
+])
+
+
+class SnapshotBuffer:
+    """双缓冲快照：写入方填充后台槽位后切换前台索引，读取方无需加锁。"""
+
+    def __init__(self, initial_snapshot):
+        self.slots = [initial_snapshot, initial_snapshot]
+        self.front = 0
+
+    def publish(self, snapshot):
+        """写入后台槽位并切换为前台。只允许模拟线程调用。"""
+        back = 1 - self.front
+        self.slots[back] = snapshot
+        # 单次赋值是原子的，读取方看到的总是完整的快照
+        self.front = back
+
+    def latest(self):
+        """返回最新发布的快照。"""
+        return self.slots[self.front]
+
+
+class SimulationThread(threading.Thread):
+    """以固定频率运行输入处理、动画和规则检查，并发布渲染快照。"""
+
+    def __init__(self, app, tick_rate=SIM_TICK_RATE):
+        super().__init__(name="simulation", daemon=True)
+        self.app = app
+        self.tick_interval = 1.0 / tick_rate
+        # 渲染线程采集的输入事件：(采集时间, 事件)
+        self.input_queue = queue.SimpleQueue()
+        self._stop_event = threading.Event()
+        # 模拟线程中抛出的异常，由渲染线程在退出时重新抛出
+        self.error = None
+
+    def submit(self, events, input_time):
+        """由渲染线程调用，把一批输入事件交给模拟线程。"""
+        for event in events:
+            self.input_queue.put((input_time, event))
+
+    def drain_inputs(self):
+        """取出所有待处理的输入，返回 (事件列表, 最早采集时间)。"""
+        events = []
+        input_time = None
+        while True:
+            try:
+                event_time, event = self.input_queue.get_nowait()
+            except queue.Empty:
+                break
+            if input_time is None:
+                input_time = event_time
+            events.append(event)
+        return events, input_time
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def run(self):
+        next_tick = time.perf_counter()
+        while not self._stop_event.is_set():
+            events, input_time = self.drain_inputs()
+            try:
+                self.app.simulation_step(events, input_time)
+            except Exception as exc:
+                # 与单线程模式一样让游戏退出，而不是停在最后一帧
+                self.error = exc
+                self.app.running = False
+                return
+            # 固定频率；落后时不追赶，直接从当前时间重新计时
+            next_tick += self.tick_interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self._stop_event.wait(delay)
+            else:
+                next_tick = time.perf_counter()
@@ -0,0 +1,154 @@
+from array import array
+from collections import deque
+from config import *
+from rules import get_move_rules, NO_RING
+
+# 离散状态表示：
+# 状态是一个元组，第 r 项为尺寸排名 r（0 为最小圆环）的 (柱子索引, 朝向)。
+# 朝向 0 表示顶部为红色，朝向 1 表示翻转后顶部为蓝色。
+# 由于大圆环不能放在小圆环上，每根柱子上的圆环总是按尺寸排好序，
+# 因此柱子上排名最小的圆环就是最顶层的圆环。
+
+# 距离表中表示无法到达胜利状态的值
+UNREACHABLE = 0xFFFF
+
+
+def initial_state(num_rings):
+    """返回所有圆环都在柱子 A 上、未翻转的初始状态。"""
+    return tuple((0, 0) for _ in range(num_rings))
+
+
+def is_goal(state, target_pillar_idx=WIN_PILLAR_INDEX):
+    """检查状态是否为胜利状态（所有圆环都在目标柱子上）。"""
+    return all(pillar == target_pillar_idx for pillar, _ in state)
+
+
+def encode_state(state, num_pillars):
+    """将状态编码为距离表中的整数索引。"""
+    base = 2 * num_pillars
+    index = 0
+    for pillar, orientation in reversed(state):
+        index = index * base + pillar * 2 + orientation
+    return index
+
+
+def decode_state(index, num_rings, num_pillars):
+    """将整数索引解码为状态。"""
+    base = 2 * num_pillars
+    state = []
+    for _ in range(num_rings):
+        index, digit = divmod(index, base)
+        state.append((digit // 2, digit % 2))
+    return tuple(state)
+
+
+def _top_rings(state, num_pillars):
+    """返回每根柱子顶层圆环的排名，空柱子为 -1。"""
+    tops = [-1] * num_pillars
+    for rank, (pillar, _) in enumerate(state):
+        if tops[pillar] == -1:
+            tops[pillar] = rank
+    return tops
+
+
+def is_legal_move(state, rank, target_pillar_idx, num_pillars):
+    """检查把排名为 rank 的圆环放到目标柱子上是否合法。"""
+    source_pillar_idx, orientation = state[rank]
+    # 只有顶层圆环可以被拿起
+    for other_rank in range(rank):
+        if state[other_rank][0] == source_pillar_idx:
+            return False
+    # 找出目标柱子上除自身外的顶层圆环
+    top_rank, top_orientation = NO_RING, 0
+    for other_rank, (pillar, other_orientation) in enumerate(state):
+        if other_rank != rank and pillar == target_pillar_idx:
+            top_rank, top_orientation = other_rank, other_orientation
+            break
+    rules = get_move_rules(len(state), num_pillars)
+    return rules.check(source_pillar_idx, target_pillar_idx, rank, orientation,
+                       top_rank, top_orientation) == MOVE_OK
+
+
+def legal_moves(state, num_pillars):
+    """返回当前状态下所有合法移动 (rank, target_pillar_idx) 的列表。"""
+    moves = []
+    for pillar, rank in enumerate(_top_rings(state, num_pillars)):
+        if rank == -1:
+            continue
+        for target_pillar_idx in (pillar, (pillar + 1) % num_pillars):
+            if is_legal_move(state, rank, target_pillar_idx, num_pillars):
+                moves.append((rank, target_pillar_idx))
+    return moves
+
+
+def apply_move(state, move):
+    """执行移动并返回新状态，移动的圆环会翻转。"""
+    rank, target_pillar_idx = move
+    new_state = list(state)
+    new_state[rank] = (target_pillar_idx, 1 - state[rank][1])
+    return tuple(new_state)
+
+
+def _predecessors(state, num_pillars):
+    """返回可以通过一次合法移动到达该状态的所有前驱状态。"""
+    result = []
+    for pillar, rank in enumerate(_top_rings(state, num_pillars)):
+        if rank == -1:
+            continue
+        orientation = state[rank][1]
+        for source_pillar_idx in (pillar, (pillar - 1) % num_pillars):
+            previous = list(state)
+            previous[rank] = (source_pillar_idx, 1 - orientation)
+            previous = tuple(previous)
+            if is_legal_move(previous, rank, pillar, num_pillars):
+                result.append(previous)
+    return result
+
+
+def build_distance_table(num_rings, num_pillars, target_pillar_idx=WIN_PILLAR_INDEX):
+    """从胜利状态反向广度优先搜索，计算每个状态到胜利的最少步数。"""
+    size = (2 * num_pillars) ** num_rings
+    distances = array('H', [UNREACHABLE]) * size
+    queue = deque()
+    # 胜利状态：所有圆环都在目标柱子上，朝向任意
+    for index in range(2 ** num_rings):
+        state = tuple((target_pillar_idx, (index >> rank) & 1)
+                      for rank in range(num_rings))
+        code = encode_state(state, num_pillars)
+        # 目标柱子上相邻圆环不受颜色限制，只要尺寸有序即为胜利
+        distances[code] = 0
+        queue.append(state)
+
+    while queue:
+        state = queue.popleft()
+        next_distance = distances[encode_state(state, num_pillars)] + 1
+        for previous in _predecessors(state, num_pillars):
+            code = encode_state(previous, num_pillars)
+            if distances[code] == UNREACHABLE:
+                distances[code] = next_distance
+                queue.append(previous)
+    return distances
+
+
+def best_move(state, distances, num_pillars):
+    """根据距离表返回使状态最接近胜利的移动，无解或已胜利时返回 None。"""
+    distance = distances[encode_state(state, num_pillars)]
+    if distance == 0 or distance == UNREACHABLE:
+        return None
+    for move in legal_moves(state, num_pillars):
+        if distances[encode_state(apply_move(state, move), num_pillars)] == distance - 1:
+            return move
+    return None
+
+
+def solve(state, distances, num_pillars):
+    """返回从给定状态到胜利状态的最短移动序列，无解时返回 None。"""
+    if distances[encode_state(state, num_pillars)] == UNREACHABLE:
+        return None
+    moves = []
+    move = best_move(state, distances, num_pillars)
+    while move is not None:
+        moves.append(move)
+        state = apply_move(state, move)
+        move = best_move(state, distances, num_pillars)
+    return moves
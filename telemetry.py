@@ -0,0 +1,173 @@
+import json
+import os
+import struct
+import threading
+import time
+from collections import deque
+from config import *
+
+# 日志级别
+LEVEL_DEBUG = 10
+LEVEL_INFO = 20
+LEVEL_WARNING = 30
+LEVELS = {"DEBUG": LEVEL_DEBUG, "INFO": LEVEL_INFO, "WARNING": LEVEL_WARNING}
+
+# 事件类型及其字段，字段均为数值，便于二进制写出
+EVENT_MOVE = 1
+EVENT_ILLEGAL_MOVE = 2
+EVENT_SELECTION = 3
+EVENT_WIN = 4
+EVENT_FRAME = 5
+EVENT_INPUT_LATENCY = 6
+EVENT_STARTUP = 7
+EVENT_NAMES = {
+    EVENT_MOVE: "move",
+    EVENT_ILLEGAL_MOVE: "illegal_move",
+    EVENT_SELECTION: "selection",
+    EVENT_WIN: "win",
+    EVENT_FRAME: "frame",
+    EVENT_INPUT_LATENCY: "input_latency",
+    EVENT_STARTUP: "startup",
+}
+EVENT_FIELDS = {
+    EVENT_MOVE: ("ring", "source", "target", "move_count"),
+    EVENT_ILLEGAL_MOVE: ("ring", "source", "target", "reason"),
+    EVENT_SELECTION: ("ring", "pillar"),
+    EVENT_WIN: ("move_count",),
+    EVENT_FRAME: ("frame_ms",),
+    EVENT_INPUT_LATENCY: ("latency_ms",),
+    # first_frame_ms：显示柱子和标签的第一帧；interactive_ms：网格就绪、可以拾取圆环；
+    # *_ms 为各预热任务的耗时，*_ready_ms 为各项功能就绪时距启动的时间
+    EVENT_STARTUP: ("first_frame_ms", "interactive_ms", "meshes_ms", "glyphs_ms", "hints_ms",
+                    "glyphs_ready_ms", "hints_ready_ms"),
+}
+
+# 二进制记录头：时间戳、事件类型、字段数；其后为若干 double 字段
+BINARY_RECORD_HEADER = struct.Struct("<dBB")
+
+
+class Telemetry:
+    """结构化事件流：事件写入内存环形缓冲区，由后台线程批量写出到文件。"""
+
+    def __init__(self, level=TELEMETRY_LEVEL, output_format=TELEMETRY_FORMAT,
+                 output_dir=TELEMETRY_DIR, buffer_size=TELEMETRY_BUFFER_SIZE,
+                 flush_interval=TELEMETRY_FLUSH_INTERVAL, sample_every=TELEMETRY_SAMPLE_EVERY):
+        # 无法识别的级别名称（例如环境变量拼写错误）按 INFO 处理
+        self.level = LEVELS.get(level.upper(), LEVEL_INFO) if isinstance(level, str) else level
+        self.output_format = output_format
+        self.output_dir = output_dir
+        self.flush_interval = flush_interval
+        # 按事件类型保存采样间隔和计数
+        names_to_events = {name: event for event, name in EVENT_NAMES.items()}
+        self.sample_every = {names_to_events[name]: every
+                             for name, every in sample_every.items()}
+        self.sample_counters = {event: 0 for event in EVENT_NAMES}
+        # deque 的 append/popleft 是线程安全的，写满后自动丢弃最旧的事件
+        self.buffer = deque(maxlen=buffer_size)
+        self.emitted = 0
+        self.written = 0
+        self.path = None
+        self._file = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def emit(self, event, level, *fields):
+        """记录一个事件。低于级别或未被采样的事件直接丢弃。"""
+        if level < self.level:
+            return
+        every = self.sample_every.get(event)
+        if every is not None:
+            count = self.sample_counters[event] + 1
+            self.sample_counters[event] = count
+            if count % every:
+                return
+        self.buffer.append((time.time(), event, fields))
+        self.emitted += 1
+
+    def start(self):
+        """打开输出文件并启动后台写出线程。"""
+        if self._thread is not None:
+            return
+        extension = "bin" if self.output_format == "binary" else "jsonl"
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.path = os.path.join(
+            self.output_dir, f"events-{stamp}-{os.getpid()}.{extension}")
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self._file = open(self.path, "wb")
+        except OSError:
+            # 无法写出时保持只在内存中缓冲
+            self._file = None
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="telemetry-flush", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """停止后台线程并写出剩余事件。"""
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """把缓冲区中的事件批量写出到文件。"""
+        if self._file is None:
+            return
+        chunks = []
+        while True:
+            try:
+                record = self.buffer.popleft()
+            except IndexError:
+                break
+            chunks.append(self._encode(record))
+        if not chunks:
+            return
+        self._file.write(b"".join(chunks))
+        self._file.flush()
+        self.written += len(chunks)
+
+    def _encode(self, record):
+        timestamp, event, fields = record
+        if self.output_format == "binary":
+            return BINARY_RECORD_HEADER.pack(timestamp, event, len(fields)) + \
+                struct.pack(f"<{len(fields)}d", *fields)
+        return json.dumps(_payload(timestamp, event, fields)).encode("utf-8") + b"\n"
+
+
+def _payload(timestamp, event, fields):
+    """把一条记录转换为 JSON 行格式的字典。"""
+    payload = {"t": timestamp, "event": EVENT_NAMES[event]}
+    payload.update(zip(EVENT_FIELDS[event], fields))
+    # 非法原因附带文字说明，日志无需对照源码即可阅读
+    if event == EVENT_ILLEGAL_MOVE:
+        payload["reason_text"] = ILLEGAL_MOVE_REASONS.get(int(payload["reason"]), "unknown")
+    return payload
+
+
+def read_binary_events(path):
+    """读取二进制事件文件，返回与 JSON 行格式相同结构的字典列表。"""
+    events = []
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset < len(data):
+        timestamp, event, count = BINARY_RECORD_HEADER.unpack_from(data, offset)
+        offset += BINARY_RECORD_HEADER.size
+        fields = struct.unpack_from(f"<{count}d", data, offset)
+        offset += 8 * count
+        events.append(_payload(timestamp, event, fields))
+    return events
+
+
+# 全局事件流，游戏和工具共用
+telemetry = Telemetry()
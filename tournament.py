@@ -0,0 +1,262 @@
+"""在进程池中批量运行自动策略对局并汇总结果。
+
+运行：python tournament.py --strategies optimal greedy random --rings 3 4 --games 200
+
+工作进程只导入规则、求解器和缓存模块（均只依赖标准库），不会导入 pygame/OpenGL。
+对局以单局为单位放入进程池的共享任务队列，空闲的工作进程随时领取下一局，
+耗时长短不一的对局因此能在各进程之间自动均衡。
+"""
+import argparse
+import importlib
+import multiprocessing
+import os
+import random
+import signal
+import threading
+import time
+from functools import lru_cache
+from config import *
+from hint_cache import load_or_build
+from solver import initial_state, is_goal, legal_moves, apply_move, encode_state, UNREACHABLE
+
+DEFAULT_MAX_MOVES = 1000
+DEFAULT_TIME_BUDGET = 5.0
+
+# 对局结束状态
+STATUS_SOLVED = "solved"
+STATUS_MOVE_BUDGET = "move_budget"
+STATUS_TIME_BUDGET = "time_budget"
+STATUS_STUCK = "stuck"
+STATUS_RESIGNED = "resigned"
+STATUS_ILLEGAL = "illegal"
+
+# 每局的时间预算由 SIGALRM 定时器强制执行，策略卡住时也能中断；
+# 没有 setitimer 的平台或非主线程中只在每步之间检查
+HAS_GAME_TIMER = hasattr(signal, "setitimer")
+
+# 结果文件中的列
+RESULT_COLUMNS = ["game_id", "strategy", "rings", "seed", "status", "solved", "moves",
+                  "optimal_moves", "elapsed_s", "moves_per_s"]
+
+
+@lru_cache(maxsize=None)
+def _tables(num_rings, num_pillars):
+    """每个工作进程只加载一次求解结果，优先从磁盘缓存读取。"""
+    return load_or_build(torus_sizes_for(num_rings), num_pillars)
+
+
+# 策略：factory(num_rings, num_pillars, rng) 返回 choose(state, moves)，
+# choose 返回 moves 中的一个移动，返回 None 表示认输。
+
+def optimal_strategy(num_rings, num_pillars, rng):
+    """按距离表走最短路径。"""
+    tables = _tables(num_rings, num_pillars)
+    return lambda state, moves: tables.next_move(state)
+
+
+def random_strategy(num_rings, num_pillars, rng):
+    """随机选择一个合法移动。"""
+    return lambda state, moves: rng.choice(moves)
+
+
+def greedy_strategy(num_rings, num_pillars, rng):
+    """优先选择使目标柱子上圆环最多的移动，相同时随机。"""
+    def choose(state, moves):
+        def score(move):
+            return sum(1 for pillar, _ in apply_move(state, move) if pillar == WIN_PILLAR_INDEX)
+        best = max(score(move) for move in moves)
+        return rng.choice([move for move in moves if score(move) == best])
+    return choose
+
+
+STRATEGIES = {
+    "optimal": optimal_strategy,
+    "random": random_strategy,
+    "greedy": greedy_strategy,
+}
+
+
+def load_strategy(spec):
+    """按名称或 "模块:函数" 形式加载策略工厂。"""
+    if spec in STRATEGIES:
+        return STRATEGIES[spec]
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"unknown strategy {spec!r}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class TimeBudgetExceeded(Exception):
+    """对局超出时间预算。"""
+
+
+def _on_time_budget(signum, frame):
+    raise TimeBudgetExceeded()
+
+
+def play_game(task):
+    """运行一局无界面对局，在步数和时间预算内结束，返回结果字典。"""
+    game_id, strategy_spec, num_rings, seed, max_moves, time_budget = task
+    num_pillars = len(PILLAR_LABELS)
+    rng = random.Random(seed)
+    distance = _tables(num_rings, num_pillars).distances[
+        encode_state(initial_state(num_rings), num_pillars)]
+
+    state = initial_state(num_rings)
+    moves_made = 0
+    status = None
+    use_timer = HAS_GAME_TIMER and threading.current_thread() is threading.main_thread()
+    if use_timer:
+        previous_handler = signal.signal(signal.SIGALRM, _on_time_budget)
+        signal.setitimer(signal.ITIMER_REAL, time_budget)
+    start = time.perf_counter()
+    try:
+        # 策略的创建也计入时间预算
+        choose = load_strategy(strategy_spec)(num_rings, num_pillars, rng)
+        while not is_goal(state):
+            if moves_made >= max_moves:
+                status = STATUS_MOVE_BUDGET
+                break
+            if time.perf_counter() - start >= time_budget:
+                status = STATUS_TIME_BUDGET
+                break
+            moves = legal_moves(state, num_pillars)
+            if not moves:
+                status = STATUS_STUCK
+                break
+            move = choose(state, moves)
+            if move is None:
+                status = STATUS_RESIGNED
+                break
+            if move not in moves:
+                status = STATUS_ILLEGAL
+                break
+            state = apply_move(state, move)
+            moves_made += 1
+        if use_timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    except TimeBudgetExceeded:
+        status = STATUS_TIME_BUDGET
+    finally:
+        if use_timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+    elapsed = time.perf_counter() - start
+    solved = status is None
+    return {
+        "game_id": game_id,
+        "strategy": strategy_spec,
+        "rings": num_rings,
+        "seed": seed,
+        "status": STATUS_SOLVED if solved else status,
+        "solved": solved,
+        "moves": moves_made,
+        "optimal_moves": -1 if distance == UNREACHABLE else distance,
+        "elapsed_s": elapsed,
+        "moves_per_s": moves_made / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def _warm_up(ring_counts):
+    """工作进程初始化：预先加载所需的求解结果。"""
+    for num_rings in ring_counts:
+        _tables(num_rings, len(PILLAR_LABELS))
+
+
+def make_tasks(strategies, ring_counts, games, seed, max_moves, time_budget):
+    """生成对局任务列表。"""
+    tasks = []
+    for strategy in strategies:
+        for num_rings in ring_counts:
+            for i in range(games):
+                tasks.append((len(tasks), strategy, num_rings, seed + i,
+                              max_moves, time_budget))
+    return tasks
+
+
+def run_tournament(tasks, workers=None, ring_counts=()):
+    """把对局分发到进程池，返回按 game_id 排序的结果列表。"""
+    # 在主进程中先求解并写入磁盘缓存，工作进程启动后直接读取
+    _warm_up(ring_counts)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [play_game(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(workers, initializer=_warm_up, initargs=(tuple(ring_counts),)) as pool:
+            # chunksize=1：每个进程空闲时才领取下一局
+            results = list(pool.imap_unordered(play_game, tasks, chunksize=1))
+    results.sort(key=lambda result: result["game_id"])
+    return results
+
+
+def to_columns(results):
+    """把结果列表转换为按列存放的字典。"""
+    return {column: [result[column] for result in results] for column in RESULT_COLUMNS}
+
+
+def save_results(path, results):
+    """以列式格式保存结果（NumPy .npz，每列一个数组）。"""
+    import numpy as np
+    columns = to_columns(results)
+    np.savez_compressed(path, **{name: np.asarray(values) for name, values in columns.items()})
+
+
+def summarize(results):
+    """按 (策略, 圆环数) 汇总解题率、步数与最优步数之比和吞吐量。"""
+    groups = {}
+    for result in results:
+        groups.setdefault((result["strategy"], result["rings"]), []).append(result)
+    summary = []
+    for (strategy, num_rings), group in sorted(groups.items()):
+        solved = [r for r in group if r["solved"]]
+        ratios = [r["moves"] / r["optimal_moves"] for r in solved if r["optimal_moves"] > 0]
+        total_moves = sum(r["moves"] for r in group)
+        total_time = sum(r["elapsed_s"] for r in group)
+        summary.append({
+            "strategy": strategy,
+            "rings": num_rings,
+            "games": len(group),
+            "solved_rate": len(solved) / len(group),
+            "mean_moves": sum(r["moves"] for r in solved) / len(solved) if solved else None,
+            "moves_over_optimal": sum(ratios) / len(ratios) if ratios else None,
+            "moves_per_s": total_moves / total_time if total_time > 0 else 0.0,
+        })
+    return summary
+
+
+def _print_summary(summary, wall_time, num_games):
+    print(f"{'strategy':<16}{'rings':>6}{'games':>7}{'solved':>9}{'moves':>9}{'x opt':>8}{'moves/s':>12}")
+    for row in summary:
+        mean_moves = "-" if row["mean_moves"] is None else f"{row['mean_moves']:.1f}"
+        ratio = "-" if row["moves_over_optimal"] is None else f"{row['moves_over_optimal']:.2f}"
+        print(f"{row['strategy']:<16}{row['rings']:>6}{row['games']:>7}{row['solved_rate']:>9.1%}"
+              f"{mean_moves:>9}{ratio:>8}{row['moves_per_s']:>12.0f}")
+    print(f"{num_games} games in {wall_time:.2f}s ({num_games / wall_time:.1f} games/s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run automated strategies against the puzzle")
+    parser.add_argument("--strategies", nargs="+", default=["optimal"],
+                        help="built-in names or module:factory specs")
+    parser.add_argument("--rings", type=int, nargs="+", default=[len(TORUS_SIZES)])
+    parser.add_argument("--games", type=int, default=100, help="games per strategy and ring count")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-moves", type=int, default=DEFAULT_MAX_MOVES)
+    parser.add_argument("--time-budget", type=float, default=DEFAULT_TIME_BUDGET,
+                        help="seconds per game")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", help="write per-game results as a columnar .npz file")
+    args = parser.parse_args(argv)
+
+    tasks = make_tasks(args.strategies, args.rings, args.games, args.seed,
+                       args.max_moves, args.time_budget)
+    start = time.perf_counter()
+    results = run_tournament(tasks, args.workers, args.rings)
+    wall_time = time.perf_counter() - start
+    _print_summary(summarize(results), wall_time, len(results))
+    if args.output:
+        save_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
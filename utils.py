@@ -1,27 +1,28 @@
-import numpy as np
 import pygame
 from OpenGL.GL import *
 from OpenGL.GLU import *
 from config import *
+import math
+from fastmath import distance2d, normalize3, is_close
 
 
-def get_mouse_ray(mx, my, width, height):
-    """根据鼠标屏幕坐标计算世界坐标中的射线。"""
-    # 获取当前视口
-    viewport = glGetIntegerv(GL_VIEWPORT)
-    # 获取当前的模型视图矩阵和投影矩阵，用于从裁剪空间和世界空间的转换。
-    modelview = glGetDoublev(GL_MODELVIEW_MATRIX)
-    projection = glGetDoublev(GL_PROJECTION_MATRIX)
-    # 鼠标的 Y 坐标转换为 OpenGL 的坐标系：OpenGL 原点在左下角，而通常屏幕坐标原点在左上角，所以要进行垂直翻转。
-    real_y = viewport[3] - my
-    # 使用 gluUnProject 将鼠标坐标转换为世界坐标中的近点和远点。
-    near = gluUnProject(mx, real_y, 0.0, modelview, projection, viewport)
-    far = gluUnProject(mx, real_y, 1.0, modelview, projection, viewport)
-    # 计算射线方向
-    direction = np.array(far) - np.array(near)
-    # 归一化方向向量
-    direction /= np.linalg.norm(direction)
-    return np.array(near), direction
+def camera_ray(mx, my, width, height, yaw, pitch, distance):
+    """不依赖 OpenGL 上下文，根据相机参数计算鼠标射线，可在模拟线程中调用。"""
+    # 与 gluPerspective 相同的透视投影，得到近平面上的点（相机坐标系）
+    tan_half_fov = math.tan(math.radians(CAMERA_FOV) / 2)
+    ndc_x = 2.0 * mx / width - 1.0
+    ndc_y = 1.0 - 2.0 * my / height
+    eye_dir = (ndc_x * tan_half_fov * width / height, ndc_y * tan_half_fov, -1.0)
+    near = (eye_dir[0] * CAMERA_NEAR, eye_dir[1] * CAMERA_NEAR, -CAMERA_NEAR + distance)
+
+    # 逆向应用渲染时的相机变换：先绕x轴转 -pitch，再绕y轴转 -yaw
+    def to_world(v):
+        a = math.radians(-pitch)
+        x, y, z = v[0], v[1] * math.cos(a) - v[2] * math.sin(a), v[1] * math.sin(a) + v[2] * math.cos(a)
+        b = math.radians(-yaw)
+        return (x * math.cos(b) + z * math.sin(b), y, -x * math.sin(b) + z * math.cos(b))
+
+    return to_world(near), normalize3(to_world(eye_dir))
 
 
 def get_pillar_index_at_pos(x, z, pillars, threshold=0.7):
@@ -29,7 +30,7 @@ def get_pillar_index_at_pos(x, z, pillars, threshold=0.7):
     for idx, pillar in enumerate(pillars):
         px, pz = pillar.position
         # 检查与柱子中心的距离是否小于阈值，
-        if np.linalg.norm([x - px, z - pz]) < threshold:
+        if distance2d(x, z, px, pz) < threshold:
             return idx
     return -1
 
@@ -51,25 +52,59 @@ def check_win_condition(tori, pillars, target_pillar_idx):
     # 检查每个圆环的外半径是否与预期相符
     for i, torus in enumerate(rings_on_target_pillar):
         # 检查圆环的外半径是否接近预期值
-        if not np.isclose(torus.outer_radius, expected_outer_radii[i], atol=0.01):
+        if not is_close(torus.outer_radius, expected_outer_radii[i], atol=0.01):
             return False
 
     return True
 
 
+def rasterize_text(font, text, color):
+    """把文本渲染为 OpenGL 可直接绘制的 RGBA 像素，返回 (像素, 宽, 高)。"""
+    text_surface = font.render(text, True, color)
+    text_data = pygame.image.tostring(text_surface, "RGBA", True)
+    return text_data, text_surface.get_width(), text_surface.get_height()
+
+
+class CachedFont:
+    """带缓存的字体：同一文本和颜色只栅格化一次，可以在后台线程预热。"""
+
+    def __init__(self, size):
+        self.size = size
+        # 仅在创建它的线程中使用的字体对象
+        self.font = pygame.font.Font(None, size)
+        self.glyphs = {}
+
+    def render_pixels(self, text, color):
+        """返回缓存的 (像素, 宽, 高)，未命中时立即栅格化。"""
+        key = (text, color)
+        entry = self.glyphs.get(key)
+        if entry is None:
+            entry = rasterize_text(self.font, text, color)
+            self.glyphs[key] = entry
+        return entry
+
+    def prewarm(self, items):
+        """预先栅格化 (text, color) 列表。使用独立的字体对象，可在后台线程调用。"""
+        font = pygame.font.Font(None, self.size)
+        for text, color in items:
+            if (text, color) not in self.glyphs:
+                self.glyphs[(text, color)] = rasterize_text(font, text, color)
+
+
 def draw_text(text, position, font, screen_size, is_ui=False, color=(255, 255, 255), align="center"):
     """在OpenGL上下文中绘制2D文本。"""
     width, height = screen_size
-    text_surface = font.render(text, True, color)
-    text_data = pygame.image.tostring(text_surface, "RGBA", True)
+    if isinstance(font, CachedFont):
+        text_data, text_width, text_height = font.render_pixels(text, color)
+    else:
+        text_data, text_width, text_height = rasterize_text(font, text, color)
+    text_rect = pygame.Rect(0, 0, text_width, text_height)
     # 如果是UI文本，则使用pygame的坐标系统
     if is_ui:
-        if align == "center":
-            text_rect = text_surface.get_rect(center=position)
-        elif align == "topleft":
-            text_rect = text_surface.get_rect(topleft=position)
+        if align == "topleft":
+            text_rect.topleft = position
         else:
-            text_rect = text_surface.get_rect(center=position)  # 默认为居中
+            text_rect.center = position  # 默认为居中
 
         x, y = text_rect.left, text_rect.top
     else:
@@ -80,8 +115,7 @@ def draw_text(text, position, font, screen_size, is_ui=False, color=(255, 255, 2
         screen_x, screen_y, _ = gluProject(
             position[0], position[1], position[2], modelview, projection, viewport)
 
-        text_rect = text_surface.get_rect(
-            center=(int(screen_x), height - int(screen_y)))
+        text_rect.center = (int(screen_x), height - int(screen_y))
         x, y = text_rect.left, text_rect.top
 
     # 切换到2D绘图模式
@@ -94,8 +128,8 @@ def draw_text(text, position, font, screen_size, is_ui=False, color=(255, 255, 2
     glLoadIdentity()
 
     # 绘制像素
-    glWindowPos2d(x, height - y - text_surface.get_height())
-    glDrawPixels(text_surface.get_width(), text_surface.get_height(),
+    glWindowPos2d(x, height - y - text_height)
+    glDrawPixels(text_width, text_height,
                  GL_RGBA, GL_UNSIGNED_BYTE, text_data)
 
     # 恢复矩阵
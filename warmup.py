@@ -0,0 +1,60 @@
+import threading
+import time
+
+# 预热任务名称
+WARMUP_MESHES = "meshes"
+WARMUP_GLYPHS = "glyphs"
+WARMUP_HINTS = "hints"
+
+
+class WarmupPipeline:
+    """在后台线程中依次执行预热任务，每完成一项就启用对应的功能。"""
+
+    def __init__(self):
+        self.tasks = []
+        # 每项任务的耗时（毫秒），失败的任务不会出现在这里
+        self.durations = {}
+        # 每项任务完成时的 perf_counter 时间
+        self.ready_times = {}
+        self.errors = {}
+        self._ready = set()
+        self._done = threading.Event()
+        self._thread = None
+
+    def add(self, name, func):
+        """添加一个预热任务，必须在 start 之前调用。"""
+        self.tasks.append((name, func))
+
+    def start(self):
+        """启动后台预热线程。"""
+        self._thread = threading.Thread(
+            target=self._run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def is_ready(self, name):
+        """检查某项预热任务是否已经完成。"""
+        return name in self._ready
+
+    @property
+    def finished(self):
+        """所有任务是否都已结束（包括失败的任务）。"""
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """等待所有任务结束。"""
+        return self._done.wait(timeout)
+
+    def _run(self):
+        for name, func in self.tasks:
+            start = time.perf_counter()
+            try:
+                func()
+            except Exception as exc:
+                # 预热失败时对应功能保持禁用，不影响游戏的其余部分
+                self.errors[name] = exc
+                continue
+            end = time.perf_counter()
+            self.durations[name] = (end - start) * 1000.0
+            self.ready_times[name] = end
+            self._ready.add(name)
+        self._done.set()